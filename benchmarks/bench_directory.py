@@ -0,0 +1,62 @@
+"""Latency of NameDirectory.has_name and reload for a large names file."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from server.services.directory import NameDirectory
+
+from .common import emit, generate_names, summarise, time_calls
+
+
+def run(size: int, lookups: int, reloads: int, seed: int) -> dict:
+    names = generate_names(size, seed=seed)
+    rng = random.Random(seed + 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        names_file = Path(tmp) / "names.txt"
+        names_file.write_text("\n".join(names) + "\n", encoding="utf-8")
+
+        started = time.perf_counter()
+        directory = NameDirectory(names_file_path=str(names_file))
+        initial_load_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        for _ in range(reloads):
+            started = time.perf_counter()
+            directory.reload()
+            samples.append((time.perf_counter() - started) * 1000)
+
+        present = [rng.choice(names) for _ in range(lookups)]
+        missing = [name[::-1] for name in present]
+        hits = iter(present)
+        misses = iter(missing)
+        return {
+            "directory_size": directory.size,
+            "initial_load_ms": round(initial_load_ms, 2),
+            "reload": summarise(samples),
+            "has_name_hit": time_calls(lambda: directory.has_name(next(hits)), lookups),
+            "has_name_miss": time_calls(lambda: directory.has_name(next(misses)), lookups),
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    emit("directory", run(args.size, args.lookups, max(args.reloads, 1), args.seed), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Latency of NameDirectory.match against a large generated directory."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+
+from server.services.directory import NameDirectory
+
+from .common import add_typo, emit, generate_names, time_calls
+
+
+def run(size: int, queries: int, seed: int) -> dict:
+    names = generate_names(size, seed=seed)
+
+    started = time.perf_counter()
+    directory = NameDirectory(names_list=names)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(seed + 1)
+    sample = rng.sample(names, min(queries, len(names)))
+    cases = {
+        "exact": list(sample),
+        "case_folded": [name.upper() for name in sample],
+        "last_first": [", ".join(reversed(name.split(" ", 1))) for name in sample],
+        "typo": [add_typo(name, rng) for name in sample],
+        "unknown": [
+            "".join(rng.choice("bcdfgkqvxz") for _ in range(len(name))) for name in sample
+        ],
+    }
+
+    results: dict = {"directory_size": len(names), "build_ms": round(build_ms, 2)}
+    for case, entries in cases.items():
+        iterator = iter(entries)
+        matched = sum(1 for entry in entries if directory.match(entry) is not None)
+        timings = time_calls(lambda: directory.match(next(iterator)), len(entries))
+        timings["matched"] = matched
+        results[case] = timings
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-p95-ms", type=float, default=5.0)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.queries, args.seed)
+    emit("matching", results, args.output)
+
+    slow = [
+        case
+        for case, timings in results.items()
+        if isinstance(timings, dict) and timings["p95_ms"] > args.max_p95_ms
+    ]
+    if slow:
+        print(f"p95 above {args.max_p95_ms}ms for: {', '.join(slow)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
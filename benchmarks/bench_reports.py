@@ -0,0 +1,114 @@
+"""Latency of /reports/ for today at several database sizes.
+
+The HTML page renders only the first page of each area and is built on
+every request; the browser then walks the remaining pages per area. The
+JSON report is cached per day, so it is timed both on a day's first fetch
+and on repeat fetches.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from urllib.parse import quote
+
+from .common import (
+    DEFAULT_AREAS,
+    emit,
+    generate_names,
+    make_app,
+    parse_sizes,
+    reports_client,
+    seed_events,
+    summarise,
+    time_calls,
+)
+
+
+def run_size(events: int, names: list, days: int, repeat: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        started = time.perf_counter()
+        seed_events(data_dir / "signin.sqlite", names, DEFAULT_AREAS, events, days=days, seed=seed)
+        seed_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        app = make_app(data_dir, names, DEFAULT_AREAS)
+        startup_s = time.perf_counter() - started
+        client = reports_client(app)
+        report_service = app.extensions["report_service"]
+
+        def fetch(path: str, expected: int = 200, **headers):
+            response = client.get(path, headers=headers)
+            if response.status_code != expected:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            return response
+
+        with app.app_context():
+            stats = report_service.stats(date.today())
+            counts = report_service.counts_for_date(date.today())
+        results: dict = {
+            "events": events,
+            "events_today": stats["day_events"],
+            "seed_s": round(seed_s, 2),
+            "startup_s": round(startup_s, 2),
+            "html_first_pages": time_calls(lambda: fetch("/reports/"), repeat),
+        }
+
+        # Each day's first fetch builds its report, later ones reuse it
+        report_days = [date.today() - timedelta(days=offset) for offset in range(min(repeat, days))]
+        for label in ("json_uncached", "json_cached"):
+            pending = iter(report_days)
+            results[label] = time_calls(
+                lambda: fetch(f"/reports/?date={next(pending)}&format=json"), len(report_days)
+            )
+        etag = fetch("/reports/?format=json").headers["ETag"]
+        results["json_not_modified"] = time_calls(
+            lambda: fetch("/reports/?format=json", 304, **{"If-None-Match": etag}), repeat
+        )
+
+        # Every page of the busiest area through the endpoint the page loads the rest from
+        area = max(counts, key=lambda name: sum(counts[name].values()), default=DEFAULT_AREAS[0])
+        page_url = f"/reports/?area={quote(area)}&format=json"
+        samples = []
+        cursor = None
+        while True:
+            started = time.perf_counter()
+            page = fetch(page_url + (f"&after={quote(cursor)}" if cursor else "")).get_json()
+            samples.append((time.perf_counter() - started) * 1000)
+            cursor = page["next"]
+            if not cursor:
+                break
+        results["area_pages"] = dict(
+            summarise(samples), area=area, total_ms=round(sum(samples), 4)
+        )
+        return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated event counts")
+    parser.add_argument("--names", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=200, help="Days the events are spread over")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    names = generate_names(args.names, seed=args.seed)
+    results = {
+        "sizes": [
+            run_size(events, names, max(args.days, 1), max(args.repeat, 1), args.seed)
+            for events in parse_sizes(args.sizes)
+        ]
+    }
+    emit("reports", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
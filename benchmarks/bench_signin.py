@@ -0,0 +1,99 @@
+"""Throughput and latency of sign-in POSTs through the Flask test client."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .common import DEFAULT_AREAS, emit, generate_names, kiosk_client, make_app, summarise
+
+
+def run(
+    names: int,
+    requests: int,
+    concurrency: int,
+    group_commit: bool,
+    production: bool,
+    seed: int,
+) -> dict:
+    directory = generate_names(names, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(
+            Path(tmp),
+            directory,
+            DEFAULT_AREAS,
+            production=production,
+            GROUP_COMMIT_ENABLED=group_commit,
+            SIGNIN_DEBOUNCE_SECONDS=0,
+        )
+        per_worker = max(requests // concurrency, 1)
+        samples: list = [[] for _ in range(concurrency)]
+
+        def worker(index: int) -> None:
+            client = kiosk_client(app, DEFAULT_AREAS[index % len(DEFAULT_AREAS)])
+            for number in range(per_worker):
+                entry = directory[(index * per_worker + number) % len(directory)]
+                started = time.perf_counter()
+                response = client.post(
+                    "/signin",
+                    data={"entry": entry, "direction": "in" if number % 2 == 0 else "out"},
+                )
+                samples[index].append((time.perf_counter() - started) * 1000)
+                if response.status_code != 302:
+                    raise RuntimeError(f"Sign-in failed with {response.status_code}")
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        writer = app.extensions["movement_service"].writer
+        if writer is not None:
+            writer.close()
+        total = sum(len(worker_samples) for worker_samples in samples)
+        results = {
+            "directory_size": len(directory),
+            "concurrency": concurrency,
+            "group_commit": group_commit,
+            "production_pragmas": production,
+            "requests": total,
+            "requests_per_second": round(total / elapsed, 1),
+            "latency": summarise([sample for worker_samples in samples for sample in worker_samples]),
+        }
+        if writer is not None:
+            results["group_commit_stats"] = writer.stats()
+        return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--group-commit", action="store_true")
+    parser.add_argument("--production", action="store_true", help="Use the production SQLite pragmas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.names,
+        args.requests,
+        max(args.concurrency, 1),
+        args.group_commit,
+        args.production,
+        args.seed,
+    )
+    emit("signin", results, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
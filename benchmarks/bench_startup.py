@@ -0,0 +1,130 @@
+"""Cold start cost: import, create_app, first responses and time until warm."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+AREAS = ("Library", "Sick Bay", "Reception", "Gym")
+
+
+def child(data_dir: Path, background: bool) -> dict:
+    """Runs in a fresh interpreter so imports are measured cold"""
+    started = time.perf_counter()
+    import server
+    from server.config import BaseConfig
+
+    imported = time.perf_counter()
+    config = BaseConfig()
+    config.DATA_DIR = str(data_dir)
+    config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{data_dir / 'signin.sqlite'}"
+    config.NAMES_FILE_PATH = str(data_dir / "names.txt")
+    config.AREAS = list(AREAS)
+    config.ACCESS_KEY = "benchmark"
+    config.NAMES_WATCH_SECONDS = 0
+    config.LOG_LEVEL = "WARNING"
+    config.WARMUP_IN_BACKGROUND = background
+    app = server.create_app(config)
+    created = time.perf_counter()
+
+    client = app.test_client()
+    health = client.get("/healthz")
+    first_health = time.perf_counter()
+
+    client.get(f"/?key=benchmark&area={AREAS[0]}")
+    with open(config.NAMES_FILE_PATH, encoding="utf-8") as handle:
+        known_name = handle.readline().strip()
+    client.post("/signin", data={"entry": known_name, "direction": "in"})
+    first_signin = time.perf_counter()
+    # Anything but an exact name needs the fuzzy index
+    client.post("/signin", data={"entry": "nobody by this name", "direction": "in"})
+    first_fuzzy = time.perf_counter()
+
+    warmup = app.extensions["warmup"]
+    warmup.wait()
+    ready = time.perf_counter()
+
+    def since_start(moment: float) -> float:
+        return round((moment - started) * 1000, 2)
+
+    return {
+        "import_ms": since_start(imported),
+        "create_app_ms": round((created - imported) * 1000, 2),
+        "first_healthz_ms": since_start(first_health),
+        "first_healthz_status": health.status_code,
+        "first_signin_ms": since_start(first_signin),
+        "first_fuzzy_signin_ms": since_start(first_fuzzy),
+        "ready_ms": since_start(ready),
+        "warmup_ms": {name: round(value * 1000, 2) for name, value in warmup.timings.items()},
+    }
+
+
+def run(size: int, events: int, repeat: int, seed: int) -> dict:
+    # Imported here because common imports the app, which the children time
+    from .common import generate_names, seed_events
+
+    names = generate_names(size, seed=seed)
+    results: dict = {"directory_size": size, "events": events}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        (data_dir / "names.txt").write_text("\n".join(names) + "\n", encoding="utf-8")
+        seed_events(data_dir / "signin.sqlite", names, AREAS, events, seed=seed)
+
+        # One throwaway start upgrades the schema and backfills the counters
+        spawn(data_dir, background=False)
+        for mode, background in (("background", True), ("blocking", False)):
+            runs = [spawn(data_dir, background) for _ in range(repeat)]
+            results[mode] = {
+                key: round(statistics.median(run[key] for run in runs), 2)
+                for key in runs[0]
+                if isinstance(runs[0][key], float)
+            }
+            results[mode]["first_healthz_status"] = runs[-1]["first_healthz_status"]
+            results[mode]["warmup_ms"] = runs[-1]["warmup_ms"]
+    return results
+
+
+def spawn(data_dir: Path, background: bool) -> dict:
+    completed = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_startup",
+            "--child", str(data_dir),
+            *([] if background else ["--blocking"]),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--blocking", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(Path(args.child), background=not args.blocking)))
+        return 0
+
+    from .common import emit
+
+    emit("startup", run(args.size, args.events, max(args.repeat, 1), args.seed), args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from sqlalchemy import create_engine, insert
+
+from server import create_app
+from server.config import BaseConfig, ProductionConfig
+from server.models import SignInEvent
+
+
+DEFAULT_AREAS = ("Library", "Sick Bay", "Reception", "Gym")
+
+
+FIRST_SYLLABLES = (
+    "al", "an", "ar", "be", "ca", "da", "el", "em", "ev", "ga", "ha", "is",
+    "ja", "jo", "ka", "la", "li", "ma", "mi", "na", "ni", "ol", "ra", "sa",
+    "so", "ta", "th", "va", "wi", "za",
+)
+LAST_SYLLABLES = (
+    "son", "ton", "ley", "man", "ford", "well", "wood", "er", "ing", "ams",
+    "ett", "ard", "ins", "ell", "oft", "ick", "berg", "ski", "ez", "ova",
+)
+
+
+def generate_names(count: int, seed: int = 1) -> List[str]:
+    """Generate unique, realistic looking "First Last" names"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        first = "".join(rng.choice(FIRST_SYLLABLES) for _ in range(rng.randint(2, 3)))
+        last = rng.choice(FIRST_SYLLABLES) + "".join(
+            rng.choice(LAST_SYLLABLES) for _ in range(rng.randint(1, 2))
+        )
+        names.add(f"{first.title()} {last.title()}")
+    return sorted(names)
+
+
+def add_typo(name: str, rng: random.Random) -> str:
+    """Swap two adjacent letters, drop one, or replace one"""
+    position = rng.randrange(1, len(name) - 1)
+    kind = rng.choice(("swap", "drop", "replace"))
+    if kind == "swap":
+        return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+    if kind == "drop":
+        return name[:position] + name[position + 1:]
+    return name[:position] + rng.choice("aeiou") + name[position + 1:]
+
+
+def seed_events(
+    database_path: Path,
+    names: Sequence[str],
+    areas: Sequence[str],
+    count: int,
+    *,
+    days: int = 30,
+    end: date | None = None,
+    seed: int = 1,
+    chunk_size: int = 50_000,
+) -> None:
+    """Write count events spread over the days up to end straight into SQLite.
+
+    Run this before make_app so startup backfills the counters and rollups.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = datetime.combine(end - timedelta(days=days - 1), datetime.min.time())
+    engine = create_engine(f"sqlite:///{database_path}")
+    SignInEvent.__table__.create(engine, checkfirst=True)
+    table = SignInEvent.__table__
+    with engine.begin() as connection:
+        remaining = count
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            rows = []
+            for _ in range(size):
+                name = rng.choice(names)
+                rows.append({
+                    "name": name,
+                    "area": rng.choice(areas),
+                    "direction": rng.choice(("IN", "OUT")),
+                    "recorded_at": start + timedelta(
+                        days=rng.randrange(days), seconds=rng.randrange(8 * 3600, 16 * 3600)
+                    ),
+                    "raw_input": name,
+                })
+            connection.execute(insert(table), rows)
+            remaining -= size
+    engine.dispose()
+
+
+def make_app(
+    data_dir: Path,
+    names: Sequence[str],
+    areas: Sequence[str],
+    *,
+    production: bool = False,
+    **overrides,
+):
+    """Build the app against a SQLite database in data_dir"""
+    config = ProductionConfig() if production else BaseConfig()
+    config.DATA_DIR = str(data_dir)
+    config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{data_dir / 'signin.sqlite'}"
+    config.NAMES_LIST = list(names)
+    config.AREAS = list(areas)
+    config.ACCESS_KEY = "benchmark"
+    config.REPORT_USERNAME = "benchmark"
+    config.REPORT_PASSWORD = "benchmark"
+    config.NAMES_WATCH_SECONDS = 0
+    config.LOG_LEVEL = "WARNING"
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    app = create_app(config)
+    # Measure a warm app; bench_startup covers the time it takes to get there
+    app.extensions["warmup"].wait()
+    return app
+
+
+def kiosk_client(app, area: str):
+    client = app.test_client()
+    client.get(f"/?key=benchmark&area={area}")
+    return client
+
+
+def reports_client(app):
+    client = app.test_client()
+    client.post("/reports/login", data={"username": "benchmark", "password": "benchmark"})
+    return client
+
+
+def parse_sizes(text: str) -> List[int]:
+    return [int(part.replace("_", "")) for part in text.split(",") if part.strip()]
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Call func repeatedly and summarise the latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarise(samples)
+
+
+def summarise(samples: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def emit(name: str, results: Dict[str, object], output: str | None = None) -> None:
+    """Print results as JSON and optionally write them to a file"""
+    document = {"benchmark": name, "environment": environment(), "results": results}
+    text = json.dumps(document, indent=2, sort_keys=True)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
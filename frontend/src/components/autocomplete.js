@@ -2,9 +2,12 @@
  * Auto-suggestions for name input
  */
 
+const SEARCH_DELAY_MS = 120;
+
 export function setupAutocomplete() {
   const entryInput = document.getElementById("entry");
-  if (!entryInput || !Array.isArray(window.names)) {
+  const searchUrl = entryInput?.dataset?.searchUrl;
+  if (!entryInput || !searchUrl) {
     return;
   }
 
@@ -14,26 +17,53 @@ export function setupAutocomplete() {
 
   let filteredNames = [];
   let selectedIndex = -1;
+  let searchTimer = null;
+  let pendingRequest = null;
 
   entryInput.addEventListener("input", handleInput);
   entryInput.addEventListener("keydown", handleKeydown);
   entryInput.addEventListener("blur", handleBlur);
 
   function handleInput(e) {
-    const query = e.target.value.toLowerCase().trim();
-    
+    const query = e.target.value.trim();
+    clearTimeout(searchTimer);
+
     if (query.length === 0) {
+      pendingRequest?.abort();
       hideDropdown();
       return;
     }
 
-    // Filter names based on input
-    filteredNames = window.names.filter(name =>
-      name.toLowerCase().includes(query)
-    ).slice(0, 8); // Limit to 8 results
+    // Wait for a pause in typing before asking the server
+    searchTimer = setTimeout(() => fetchSuggestions(query), SEARCH_DELAY_MS);
+  }
+
+  async function fetchSuggestions(query) {
+    pendingRequest?.abort();
+    const controller = new AbortController();
+    pendingRequest = controller;
+
+    try {
+      const url = `${searchUrl}?q=${encodeURIComponent(query)}`;
+      const response = await fetch(url, {
+        headers: { Accept: "application/json" },
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        hideDropdown();
+        return;
+      }
+      const data = await response.json();
+      filteredNames = Array.isArray(data.names) ? data.names : [];
+    } catch (error) {
+      if (error.name !== "AbortError") {
+        hideDropdown();
+      }
+      return;
+    }
 
     selectedIndex = -1;
-    
+
     if (filteredNames.length > 0) {
       showDropdown(filteredNames);
     } else {
@@ -63,17 +63,6 @@ function setupSigninForm() {
       return;
     }
 
-    // Validate name exists in the list
-    if (window.names && !window.names.includes(name)) {
-      event.preventDefault();
-      showError(
-        errorElement,
-        "Name not found. Please select from the suggestions."
-      );
-      entryInput?.focus();
-      return;
-    }
-
     hideError(errorElement);
 
     if (clickedButton) {
@@ -0,0 +1,69 @@
+/**
+ * Live movement feed for the reports page
+ */
+
+import { createRow } from "./report-table";
+
+// Matches the server's default STREAM_RETRY_SECONDS
+const STREAM_RETRY_MS = 30000;
+
+export function setupLiveReport() {
+  const container = document.querySelector("[data-report-stream]");
+  if (!container || typeof EventSource === "undefined") {
+    return;
+  }
+
+  const reportDate = container.dataset.reportDate;
+  const seen = new Set();
+  let lastEventId = null;
+
+  const connect = () => {
+    const url = new URL(container.dataset.reportStream, window.location.href);
+    if (lastEventId) {
+      url.searchParams.set("last_event_id", lastEventId);
+    }
+    // EventSource resends the last id itself when it reconnects
+    const source = new EventSource(url);
+
+    source.addEventListener("movement", (event) => {
+      lastEventId = event.lastEventId || lastEventId;
+      const movement = JSON.parse(event.data);
+      if (seen.has(movement.id) || !movement.recorded_at.startsWith(reportDate)) {
+        return;
+      }
+      seen.add(movement.id);
+      appendMovement(container, movement);
+    });
+
+    source.addEventListener("error", () => {
+      // A full server answers 503, which EventSource does not retry on its own
+      if (source.readyState === EventSource.CLOSED) {
+        setTimeout(connect, STREAM_RETRY_MS);
+      }
+    });
+  };
+
+  connect();
+}
+
+function appendMovement(container, movement) {
+  const card = Array.from(container.querySelectorAll("[data-area]")).find(
+    (element) => element.dataset.area === movement.area
+  );
+  if (!card) {
+    return;
+  }
+
+  if (card.reportTable) {
+    card.reportTable.receive(movement);
+  } else {
+    card.querySelector("[data-events]")?.appendChild(createRow(movement));
+    card.querySelector("[data-events-table]")?.classList.remove("hidden");
+    card.querySelector("[data-events-empty]")?.classList.add("hidden");
+  }
+
+  const counter = card.querySelector(`[data-count="${movement.direction}"]`);
+  if (counter) {
+    counter.textContent = String(Number(counter.textContent) + 1);
+  }
+}
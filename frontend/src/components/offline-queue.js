@@ -0,0 +1,216 @@
+/**
+ * Offline sign-in queue for kiosks with patchy network
+ */
+
+const STORAGE_KEY = "signin-queue";
+const REJECTED_KEY = "signin-queue-rejected";
+const FLUSH_INTERVAL_MS = 30000;
+const SUBMIT_TIMEOUT_MS = 10000;
+const BATCH_SIZE = 100;
+
+export function setupOfflineQueue() {
+  const form = document.getElementById("signin-form");
+  if (!form || !form.dataset.batchUrl || typeof localStorage === "undefined") {
+    return;
+  }
+
+  const batchUrl = form.dataset.batchUrl;
+  let flushing = false;
+
+  showRejected(form);
+
+  form.addEventListener("submit", async (event) => {
+    if (event.defaultPrevented) {
+      return;
+    }
+    const entryInput = document.getElementById("entry");
+    const entry = entryInput?.value?.trim();
+    if (!entry) {
+      return;
+    }
+
+    // The kiosk often still has Wi-Fi when the server is down, so send the
+    // sign-in ourselves and queue it whenever it does not get through
+    event.preventDefault();
+    const item = {
+      entry,
+      direction: document.getElementById("direction-input")?.value || "in",
+      area: form.dataset.area,
+      recorded_at: new Date().toISOString(),
+      idempotency_key: createKey(),
+    };
+    const controller = new AbortController();
+    const timeout = setTimeout(() => controller.abort(), SUBMIT_TIMEOUT_MS);
+    try {
+      const response = await fetch(form.action, {
+        method: "POST",
+        body: new FormData(form),
+        credentials: "same-origin",
+        // The flash message stays in the session for the page we load next
+        redirect: "manual",
+        signal: controller.signal,
+      });
+      if (response.status < 500) {
+        window.location.assign(form.action);
+        return;
+      }
+    } catch (error) {
+      // Server unreachable or too slow to answer
+    } finally {
+      clearTimeout(timeout);
+    }
+
+    enqueue(item);
+    entryInput.value = "";
+    resetButtons(form);
+    showQueuedMessage(entry);
+  });
+
+  const flush = async () => {
+    if (flushing || !navigator.onLine) {
+      return;
+    }
+    flushing = true;
+    try {
+      let queue = readQueue();
+      while (queue.length) {
+        const batch = queue.slice(0, BATCH_SIZE);
+        const response = await fetch(batchUrl, {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          credentials: "same-origin",
+          body: JSON.stringify({ events: batch }),
+        });
+        if (!response.ok) {
+          break;
+        }
+        // Recorded and duplicate events are settled; rejected ones were already
+        // shown as saved, so keep them for staff to follow up
+        const { results } = await response.json();
+        const settled = new Set(results.map((result) => result.idempotency_key));
+        const reasons = new Map(
+          results
+            .filter((result) => result.status === "rejected")
+            .map((result) => [result.idempotency_key, result.reason])
+        );
+        const rejected = batch
+          .filter((item) => reasons.has(item.idempotency_key))
+          .map((item) => ({ ...item, reason: reasons.get(item.idempotency_key) }));
+        if (rejected.length) {
+          writeRejected([...readRejected(), ...rejected]);
+          showRejected(form);
+        }
+        queue = readQueue().filter((item) => !settled.has(item.idempotency_key));
+        writeQueue(queue);
+        if (!batch.some((item) => settled.has(item.idempotency_key))) {
+          break;
+        }
+      }
+    } catch (error) {
+      // Still offline, try again on the next interval
+    } finally {
+      flushing = false;
+    }
+  };
+
+  window.addEventListener("online", flush);
+  setInterval(flush, FLUSH_INTERVAL_MS);
+  flush();
+}
+
+function readQueue() {
+  try {
+    return JSON.parse(localStorage.getItem(STORAGE_KEY)) || [];
+  } catch (error) {
+    return [];
+  }
+}
+
+function writeQueue(queue) {
+  localStorage.setItem(STORAGE_KEY, JSON.stringify(queue));
+}
+
+function readRejected() {
+  try {
+    return JSON.parse(localStorage.getItem(REJECTED_KEY)) || [];
+  } catch (error) {
+    return [];
+  }
+}
+
+function writeRejected(items) {
+  localStorage.setItem(REJECTED_KEY, JSON.stringify(items));
+}
+
+function enqueue(item) {
+  writeQueue([...readQueue(), item]);
+}
+
+function createKey() {
+  if (window.crypto?.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+function resetButtons(form) {
+  form.querySelectorAll("button[type='submit']").forEach((button) => {
+    button.disabled = false;
+    button.classList.remove("opacity-50");
+    if (button.dataset.originalText) {
+      button.textContent = button.dataset.originalText;
+    }
+  });
+}
+
+function showQueuedMessage(entry) {
+  const message = document.createElement("div");
+  message.className = "flash-message flash-warning animate-fade-in";
+  message.textContent = `Saved offline: ${entry}. It will be sent when the server can be reached.`;
+  const form = document.getElementById("signin-form");
+  form?.parentElement?.insertBefore(message, form);
+  setTimeout(() => message.remove(), 5000);
+}
+
+function showRejected(form) {
+  document.getElementById("offline-rejected")?.remove();
+  const rejected = readRejected();
+  if (!rejected.length) {
+    return;
+  }
+
+  // Stays until staff dismiss each entry, unlike the flash messages
+  const panel = document.createElement("div");
+  panel.id = "offline-rejected";
+  panel.className = "flash-message flash-error flex-col items-start";
+  const heading = document.createElement("p");
+  heading.className = "font-semibold";
+  heading.textContent = `${rejected.length} offline sign-in${
+    rejected.length === 1 ? " was" : "s were"
+  } not recorded and need staff review.`;
+  panel.appendChild(heading);
+
+  const list = document.createElement("ul");
+  list.className = "w-full space-y-1";
+  rejected.forEach((item) => {
+    const row = document.createElement("li");
+    row.className = "flex items-center gap-2";
+    const when = new Date(item.recorded_at).toLocaleString();
+    const text = document.createElement("span");
+    text.textContent = `${item.entry}, signed ${item.direction} at ${when}: ${item.reason || "rejected"}`;
+    const dismiss = document.createElement("button");
+    dismiss.type = "button";
+    dismiss.className = "ml-auto underline opacity-70 hover:opacity-100";
+    dismiss.textContent = "Dismiss";
+    dismiss.addEventListener("click", () => {
+      writeRejected(
+        readRejected().filter((other) => other.idempotency_key !== item.idempotency_key)
+      );
+      showRejected(form);
+    });
+    row.append(text, dismiss);
+    list.appendChild(row);
+  });
+  panel.appendChild(list);
+  form.parentElement?.insertBefore(panel, form);
+}
@@ -0,0 +1,216 @@
+/**
+ * Progressive loading and windowed rendering for long daily report tables
+ */
+
+const DIRECTION_BADGES = {
+  IN: {
+    label: "Check-In",
+    classes: "bg-success-100 text-success-800",
+    icon: "M11 16l-4-4m0 0l4-4m-4 4h14m-5 4v1a3 3 0 01-3 3H6a3 3 0 01-3-3V7a3 3 0 013-3h7a3 3 0 013 3v1",
+  },
+  OUT: {
+    label: "Check-Out",
+    classes: "bg-warning-100 text-warning-800",
+    icon: "M17 16l4-4m0 0l-4-4m4 4H7m6 4v1a3 3 0 01-3 3H6a3 3 0 01-3-3V7a3 3 0 013-3h4a3 3 0 013 3v1",
+  },
+};
+
+// Past this many rows only the visible window is kept in the DOM
+const VIRTUALIZE_AFTER = 300;
+const VISIBLE_ROWS = 25;
+const OVERSCAN_ROWS = 15;
+const FALLBACK_ROW_HEIGHT = 41;
+
+export function setupReportTables() {
+  const report = document.querySelector("[data-report]");
+  if (!report) {
+    return;
+  }
+
+  report.querySelectorAll("[data-area]").forEach((card) => {
+    const table = new ReportTable(card, report.dataset.personUrl);
+    card.reportTable = table;
+    table.loadRemaining();
+  });
+}
+
+class ReportTable {
+  constructor(card, personUrl) {
+    this.card = card;
+    this.personUrl = personUrl;
+    this.body = card.querySelector("[data-events]");
+    this.scroller = card.querySelector("[data-events-table]");
+    this.eventsUrl = card.dataset.eventsUrl;
+    this.nextCursor = card.dataset.nextCursor || null;
+    this.events = Array.from(this.body?.rows || [], readRow);
+    this.ids = new Set(this.events.map((movement) => movement.id));
+    // Live movements wait until paging catches up so rows stay in time order
+    this.pending = [];
+    this.virtual = false;
+    this.rowHeight = FALLBACK_ROW_HEIGHT;
+    this.frame = null;
+  }
+
+  receive(movement) {
+    if (this.nextCursor) {
+      this.pending.push(movement);
+      return;
+    }
+    this.append([movement], { animate: true });
+  }
+
+  append(movements, { animate = false } = {}) {
+    const fresh = movements.filter((movement) => !this.ids.has(movement.id));
+    if (!fresh.length || !this.body) {
+      return;
+    }
+    fresh.forEach((movement) => {
+      this.ids.add(movement.id);
+      this.events.push(movement);
+    });
+
+    if (!this.virtual && this.events.length > VIRTUALIZE_AFTER) {
+      this.virtualize();
+    }
+    if (this.virtual) {
+      this.scheduleRender();
+    } else {
+      this.body.append(...fresh.map((movement) => createRow(movement, this.personUrl, animate)));
+    }
+
+    this.scroller?.classList.remove("hidden");
+    this.card.querySelector("[data-events-empty]")?.classList.add("hidden");
+  }
+
+  async loadRemaining() {
+    while (this.nextCursor) {
+      const url = new URL(this.eventsUrl, window.location.href);
+      url.searchParams.set("after", this.nextCursor);
+      let page;
+      try {
+        const response = await fetch(url, {
+          headers: { Accept: "application/json" },
+          credentials: "same-origin",
+        });
+        if (!response.ok) {
+          break;
+        }
+        page = await response.json();
+      } catch (error) {
+        break;
+      }
+      this.append(page.events);
+      this.nextCursor = page.next;
+      // Let the browser paint and handle input between pages
+      await idle();
+    }
+
+    this.nextCursor = null;
+    const pending = this.pending;
+    this.pending = [];
+    this.append(pending, { animate: true });
+  }
+
+  virtualize() {
+    this.virtual = true;
+    const sample = this.body.rows[0];
+    if (sample && sample.offsetHeight) {
+      this.rowHeight = sample.offsetHeight;
+    }
+    this.scroller.style.maxHeight = `${this.rowHeight * VISIBLE_ROWS}px`;
+    this.scroller.style.overflowY = "auto";
+    this.scroller.addEventListener("scroll", () => this.scheduleRender(), { passive: true });
+  }
+
+  scheduleRender() {
+    if (this.frame !== null) {
+      return;
+    }
+    this.frame = requestAnimationFrame(() => {
+      this.frame = null;
+      this.render();
+    });
+  }
+
+  render() {
+    const total = this.events.length;
+    const first = Math.max(0, Math.floor(this.scroller.scrollTop / this.rowHeight) - OVERSCAN_ROWS);
+    const last = Math.min(total, first + VISIBLE_ROWS + OVERSCAN_ROWS * 2);
+
+    // Spacer rows keep the scrollbar sized for every event
+    const fragment = document.createDocumentFragment();
+    fragment.append(createSpacer(first * this.rowHeight));
+    for (let index = first; index < last; index += 1) {
+      fragment.append(createRow(this.events[index], this.personUrl, false));
+    }
+    fragment.append(createSpacer((total - last) * this.rowHeight));
+    this.body.replaceChildren(fragment);
+  }
+}
+
+export function createRow(movement, personUrl, animate = true) {
+  const badge = DIRECTION_BADGES[movement.direction] || DIRECTION_BADGES.OUT;
+  const row = document.createElement("tr");
+  row.className = `hover:bg-gray-50 transition-colors${animate ? " animate-fade-in" : ""}`;
+
+  const time = document.createElement("td");
+  time.className = "font-medium";
+  time.textContent = new Date(movement.recorded_at).toLocaleTimeString([], {
+    hour: "2-digit",
+    minute: "2-digit",
+  });
+
+  const name = document.createElement("td");
+  if (personUrl) {
+    const link = document.createElement("a");
+    link.href = personUrl.replace("__name__", encodeURIComponent(movement.name));
+    link.textContent = movement.name;
+    name.append(link);
+  } else {
+    name.textContent = movement.name;
+  }
+
+  const action = document.createElement("td");
+  action.innerHTML = `
+    <span class="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium ${badge.classes}">
+      <svg class="w-3 h-3 mr-1" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="${badge.icon}"></path>
+      </svg>
+      ${badge.label}
+    </span>
+  `;
+
+  row.append(time, name, action);
+  return row;
+}
+
+function createSpacer(height) {
+  const row = document.createElement("tr");
+  row.setAttribute("aria-hidden", "true");
+  const cell = document.createElement("td");
+  cell.colSpan = 3;
+  cell.style.height = `${height}px`;
+  cell.style.padding = "0";
+  cell.style.border = "0";
+  row.append(cell);
+  return row;
+}
+
+function readRow(row) {
+  return {
+    id: Number(row.dataset.id),
+    name: row.dataset.name,
+    direction: row.dataset.direction,
+    recorded_at: row.dataset.recordedAt,
+  };
+}
+
+function idle() {
+  return new Promise((resolve) => {
+    if (typeof window.requestIdleCallback === "function") {
+      window.requestIdleCallback(() => resolve(), { timeout: 200 });
+    } else {
+      setTimeout(resolve, 0);
+    }
+  });
+}
@@ -2,6 +2,9 @@ import "./styles/main.scss";
 import { setupAutocomplete } from "./components/autocomplete";
 import { setupFlashMessages } from "./components/flash-messages";
 import { setupForms } from "./components/forms";
+import { setupLiveReport } from "./components/live-report";
+import { setupOfflineQueue } from "./components/offline-queue";
+import { setupReportTables } from "./components/report-table";
 
 class App {
   constructor() {
@@ -18,8 +21,12 @@ class App {
 
   setup() {
     setupForms();
+    setupOfflineQueue();
     setupAutocomplete();
     setupFlashMessages();
+    // Tables first so live movements have somewhere to go
+    setupReportTables();
+    setupLiveReport();
 
     this.setupFocus();
   }
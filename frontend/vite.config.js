@@ -1,8 +1,45 @@
 import { defineConfig } from "vite";
 import { resolve } from "path";
+import { readFileSync, writeFileSync } from "fs";
+import { brotliCompressSync, constants, gzipSync } from "zlib";
+
+const COMPRESSIBLE = /\.(js|mjs|css|svg|json|txt|map)$/;
+// Below this the encoding overhead outweighs the saving
+const MIN_COMPRESS_BYTES = 1024;
+
+// Writes .br and .gz copies of each text asset for the server to send as-is
+function precompress() {
+  return {
+    name: "precompress",
+    apply: "build",
+    writeBundle(options, bundle) {
+      for (const fileName of Object.keys(bundle)) {
+        if (!COMPRESSIBLE.test(fileName)) {
+          continue;
+        }
+        const path = resolve(options.dir, fileName);
+        const source = readFileSync(path);
+        if (source.length < MIN_COMPRESS_BYTES) {
+          continue;
+        }
+        writeFileSync(`${path}.gz`, gzipSync(source, { level: 9 }));
+        writeFileSync(
+          `${path}.br`,
+          brotliCompressSync(source, {
+            params: {
+              [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+              [constants.BROTLI_PARAM_SIZE_HINT]: source.length,
+            },
+          })
+        );
+      }
+    },
+  };
+}
 
 export default defineConfig({
   base: "/static/dist/",
+  plugins: [precompress()],
   build: {
     manifest: true,
     outDir: "../static/dist",
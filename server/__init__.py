@@ -2,22 +2,43 @@ from __future__ import annotations
 
 import logging
 import os
+from datetime import time
 from typing import Optional
 
+import click
 from flask import Flask
+from flask.logging import default_handler
+from sqlalchemy import event
 
+from .blueprints.api import api_bp
 from .blueprints.reports import reports_bp
 from .blueprints.ui import ui_bp
 from .config import BaseConfig, load_config
 from .extensions import db
+from .log import configure_logging
+from .migrations import upgrade_schema
+from .services.analytics import AnalyticsService
+from .services.archive import EventArchive, parse_window
+from .services.broadcast import EventBroadcaster
 from .services.movements import MovementService
 from .services.directory import NameDirectory
+from .services.metrics import Metrics
+from .services.presence import PresenceIndex
 
 from .services.reports import ReportService
-from .vite import vite_asset, vite_styles
-
-
-def create_app(config: Optional[str | type[BaseConfig] | BaseConfig] = None) -> Flask:
+from .services.shells import PageShellCache
+from .services.warmup import Warmup
+from .services.writer import GroupCommitWriter
+from .vite import init_app as init_vite, vite_asset, vite_styles
+
+
+def create_app(
+    config: Optional[str | type[BaseConfig] | BaseConfig] = None,
+    *,
+    start_background: bool = True,
+) -> Flask:
+    """Build the app; with start_background=False no threads are started, for
+    a server that forks workers and starts them in each worker instead"""
     app = Flask(
         __name__,
         static_folder="../static",
@@ -40,52 +61,162 @@ def create_app(config: Optional[str | type[BaseConfig] | BaseConfig] = None) ->
     _register_cli(app)
 
     with app.app_context():
-        db.create_all()
+        upgrade_schema()
+    if start_background:
+        # Health and sign-in are served straight away; anything not warm yet loads on first use
+        warmup: Warmup = app.extensions["warmup"]
+        # A blocking warm-up that fails keeps retrying in the background
+        if app.config.get("WARMUP_IN_BACKGROUND", True) or not warmup.run(app):
+            warmup.start(app)
+        start_background_tasks(app, poll_seconds=app.config.get("STREAM_POLL_SECONDS", 0))
 
     return app
 
 
+def start_background_tasks(app: Flask, *, poll_seconds: float) -> None:
+    """Start the directory watcher, live report poller and archive schedule"""
+    app.extensions["name_directory"].start_watching(app.config.get("NAMES_WATCH_SECONDS", 0))
+    app.extensions["event_broadcaster"].start_polling(app, poll_seconds)
+    app.extensions["event_archive"].start_schedule(
+        app,
+        interval=app.config.get("ARCHIVE_INTERVAL_HOURS", 0) * 3600,
+        retention_days=app.config.get("ARCHIVE_RETENTION_DAYS", 0),
+        vacuum_window=parse_window(app.config.get("ARCHIVE_VACUUM_WINDOW")),
+    )
+
+
 def _configure_logging(app: Flask) -> None:
     level_name = app.config.get("LOG_LEVEL", "INFO").upper()
     level = getattr(logging, level_name, logging.INFO)
-    logging.basicConfig(level=level)
+    # Requests only enqueue records; a background thread formats and writes them
+    configure_logging(level, json_format=app.config.get("LOG_FORMAT", "json") == "json")
+    app.logger.removeHandler(default_handler)
     app.logger.setLevel(level)
 
 
 def _register_extensions(app: Flask) -> None:
     db.init_app(app)
+    _configure_sqlite(app)
+    _configure_metrics(app)
+
+
+def _configure_metrics(app: Flask) -> None:
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    metrics = Metrics()
+    with app.app_context():
+        metrics.init_app(app, db.engine, db.session)
+    app.extensions["metrics"] = metrics
+
+
+def _configure_sqlite(app: Flask) -> None:
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
 
 
 def _register_services(app: Flask) -> None:
     directory = NameDirectory(
         names_file_path=app.config.get("NAMES_FILE_PATH"),
         names_list=app.config.get("NAMES_LIST", []),
+        match_error_ratio=app.config.get("NAME_MATCH_ERROR_RATIO", 0.2),
+        students_csv_path=app.config.get("STUDENT_CSV_PATH"),
+        lazy=True,
     )
     app.extensions["name_directory"] = directory
 
-    attendance_service = MovementService()
+    archive = EventArchive(
+        app.config.get("ARCHIVE_DIR")
+        or os.path.join(app.config.get("DATA_DIR") or app.instance_path, "archive")
+    )
+    app.extensions["event_archive"] = archive
+
+    attendance_service = MovementService(
+        debounce_seconds=app.config.get("SIGNIN_DEBOUNCE_SECONDS", 0),
+        debounce_max_entries=app.config.get("SIGNIN_DEBOUNCE_MAX_ENTRIES", 4096),
+        archive=archive,
+    )
+    if app.config.get("GROUP_COMMIT_ENABLED"):
+        attendance_service.writer = GroupCommitWriter(
+            app,
+            persist=attendance_service.persist,
+            on_commit=attendance_service.notify_committed,
+            interval_ms=app.config.get("GROUP_COMMIT_INTERVAL_MS", 10),
+            max_batch=app.config.get("GROUP_COMMIT_MAX_BATCH", 64),
+        )
     app.extensions["movement_service"] = attendance_service
 
+    presence_index = PresenceIndex(areas=app.config.get("AREAS", []))
+    attendance_service.subscribe(presence_index.record)
+    app.extensions["presence_index"] = presence_index
+
+    broadcaster = EventBroadcaster(
+        history_size=app.config.get("STREAM_HISTORY_SIZE", 1000),
+        max_subscribers=app.config.get("STREAM_MAX_CLIENTS", 0),
+    )
+    attendance_service.subscribe(broadcaster.publish)
+    app.extensions["event_broadcaster"] = broadcaster
+
     report_service = ReportService(
         movement_service=attendance_service,
         areas=app.config.get("AREAS", []),
+        cache_size=app.config.get("REPORT_CACHE_SIZE", 64),
+        today_ttl=app.config.get("REPORT_CACHE_TODAY_TTL", 30),
     )
     app.extensions["report_service"] = report_service
 
+    analytics_service = AnalyticsService(
+        movement_service=attendance_service,
+        areas=app.config.get("AREAS", []),
+        day_end=time.fromisoformat(app.config.get("ANALYTICS_DAY_END", "16:00")),
+        today_ttl=app.config.get("ANALYTICS_TODAY_TTL", 60),
+    )
+    app.extensions["analytics_service"] = analytics_service
+
+    app.extensions["page_shells"] = PageShellCache(
+        max_entries=app.config.get("PAGE_SHELL_CACHE_SIZE", 64)
+    )
+
+    warmup = Warmup()
+    warmup.add("directory", directory.warm)
+    warmup.add("presence", presence_index.rebuild)
+    # Sign-ins recorded while rebuilding were applied to the old state
+    warmup.add("presence_catch_up", presence_index.catch_up)
+    # Stores visits for finished days once, so reports only pair today live
+    warmup.add(
+        "analytics",
+        lambda: analytics_service.prepare(app.config.get("REPORT_MAX_RANGE_DAYS", 400)),
+    )
+    app.extensions["warmup"] = warmup
+
 
 def _register_blueprints(app: Flask) -> None:
     app.register_blueprint(ui_bp)
     app.register_blueprint(reports_bp, url_prefix="/reports")
+    app.register_blueprint(api_bp, url_prefix="/api")
 
 
 def _register_template_helpers(app: Flask) -> None:
+    init_vite(app)
+
     @app.context_processor
     def _inject_vite_helpers() -> dict[str, object]:
         return {"vite_asset": vite_asset, "vite_styles": vite_styles}
 
 
 def _register_cli(app: Flask) -> None:
-    from datetime import date
+    from datetime import date, timedelta
 
     @app.cli.command("reload-directory")
     def reload_directory() -> None:
@@ -93,5 +224,22 @@ def _register_cli(app: Flask) -> None:
         directory.reload()
         app.logger.info("Name directory reloaded")
 
-
-__all__ = ["create_app"]
+    @app.cli.command("archive-events")
+    @click.option("--days", type=int, default=None, help="Keep this many days in the database")
+    @click.option("--vacuum/--no-vacuum", default=True, help="Compact the database afterwards")
+    def archive_events(days: Optional[int], vacuum: bool) -> None:
+        retention = days if days is not None else app.config.get("ARCHIVE_RETENTION_DAYS", 365)
+        archive: EventArchive = app.extensions["event_archive"]
+        try:
+            moved = archive.archive_before(
+                date.today() - timedelta(days=retention),
+                batch_size=app.config.get("ARCHIVE_BATCH_SIZE", 5000),
+            )
+        except BlockingIOError:
+            raise click.ClickException("Archiving is already running in another process")
+        if moved and vacuum:
+            archive.vacuum()
+        click.echo(f"Archived {moved} events to {archive.directory}")
+
+
+__all__ = ["create_app", "start_background_tasks"]
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import os
+from typing import List, Optional
+
+from . import create_app
+from .serve import serve
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the production server")
+    serve_parser.add_argument(
+        "--config",
+        default=os.getenv("APP_CONFIG", "server.config:ProductionConfig"),
+        help="Config class as module:Class",
+    )
+    serve_parser.add_argument("--host")
+    serve_parser.add_argument("--port", type=int)
+    serve_parser.add_argument("--workers", type=int)
+    serve_parser.add_argument("--threads", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        # Threads started before gunicorn forks would be copied mid-flight into
+        # every worker; each worker starts its own instead
+        app = create_app(args.config, start_background=False)
+        serve(app, host=args.host, port=args.port, workers=args.workers, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import Blueprint, current_app, jsonify, request, session
+
+from ..services.directory import NameDirectory
+from ..services.movements import MovementService
+
+
+api_bp = Blueprint("api", __name__)
+
+
+@api_bp.before_request
+def require_access_key() -> Optional[tuple]:
+    # The API is only for kiosks that have already entered the access key
+    if "access_key" not in session:
+        return jsonify({"error": "Access denied"}), 403
+    return None
+
+
+@api_bp.route("/names/search", methods=["GET"])
+def search_names():
+    query = (request.args.get("q") or "").strip()
+    limit = request.args.get("limit", type=int) or current_app.config.get("NAME_SEARCH_LIMIT", 8)
+    limit = max(1, min(limit, current_app.config.get("NAME_SEARCH_MAX_LIMIT", 50)))
+
+    directory: NameDirectory = current_app.extensions["name_directory"]
+    return jsonify({"query": query, "names": directory.search(query, limit=limit)})
+
+
+@api_bp.route("/events/batch", methods=["POST"])
+def record_batch():
+    payload = request.get_json(silent=True)
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(events, list):
+        return jsonify({"error": "Expected a JSON object with an events list"}), 400
+    max_events = current_app.config.get("BATCH_MAX_EVENTS", 500)
+    if len(events) > max_events:
+        return jsonify({"error": f"At most {max_events} events per batch"}), 413
+
+    directory: NameDirectory = current_app.extensions["name_directory"]
+    valid_areas = current_app.config.get("AREAS", [])
+    results: List[Dict[str, str]] = []
+    accepted: List[Dict[str, object]] = []
+
+    for item in events:
+        if not isinstance(item, dict):
+            results.append({"idempotency_key": "", "status": "rejected", "reason": "not an object"})
+            continue
+        key = str(item.get("idempotency_key") or "").strip()
+        result = {"idempotency_key": key, "status": "rejected"}
+        results.append(result)
+
+        entry = str(item.get("entry") or "").strip()
+        area = item.get("area") or session.get("area")
+        direction = str(item.get("direction") or "in").strip().lower()
+        recorded_at = _parse_timestamp(item.get("recorded_at"))
+        if not key or len(key) > 64:
+            result["reason"] = "missing or invalid idempotency_key"
+        elif area not in valid_areas:
+            result["reason"] = "unknown area"
+        elif direction not in {"in", "out"}:
+            result["reason"] = "direction must be in or out"
+        elif recorded_at is None:
+            result["reason"] = "invalid recorded_at"
+        else:
+            name = directory.match(entry) if entry else None
+            if name is None:
+                result["reason"] = "name not matched"
+            else:
+                result["status"] = "pending"
+                accepted.append({
+                    "name": name,
+                    "area": area,
+                    "direction": direction,
+                    "recorded_at": recorded_at,
+                    "raw_input": entry,
+                    "idempotency_key": key,
+                })
+
+    movements: MovementService = current_app.extensions["movement_service"]
+    stored, _ = movements.record_batch(accepted)
+    stored_keys = {event.idempotency_key for event in stored}
+    for result in results:
+        if result["status"] != "pending":
+            continue
+        key = result["idempotency_key"]
+        result["status"] = "recorded" if key in stored_keys else "duplicate"
+        if key in stored_keys:
+            # A key repeated within one batch is only recorded once
+            stored_keys.discard(key)
+    current_app.logger.info(
+        "Batch upload: %d recorded, %d duplicate, %d rejected",
+        sum(result["status"] == "recorded" for result in results),
+        sum(result["status"] == "duplicate" for result in results),
+        sum(result["status"] == "rejected" for result in results),
+    )
+    return jsonify({"results": results})
+
+
+def _parse_timestamp(value: object) -> Optional[datetime]:
+    """Parse a client ISO 8601 timestamp into the server's naive local time"""
+    if value in (None, ""):
+        return datetime.now()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    # Kiosk clocks drift; never store a movement in the future
+    return min(parsed, datetime.now())
+
+
+__all__ = ["api_bp"]
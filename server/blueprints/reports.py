@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Optional
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional, Tuple
 
 from flask import (
     Blueprint,
@@ -13,12 +17,21 @@ from flask import (
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 
+from ..services.analytics import AnalyticsService
+from ..services.broadcast import EventBroadcaster, StreamLimitReached
+from ..services.directory import NameDirectory
+from ..services.movements import MovementRecord, MovementService, MovementSummary
+from ..services.presence import PresenceIndex
 from ..services.reports import ReportService
 
 
+EXPORT_COLUMNS = ("id", "recorded_at", "area", "name", "direction", "raw_input")
+
+
 reports_bp = Blueprint("reports", __name__)
 
 
@@ -61,28 +74,295 @@ def login():
 
 @reports_bp.route("/", methods=["GET"])
 def reports():
+    if request.args.get("from") or request.args.get("to"):
+        return _range_report()
+
     target_date = _parse_date(request.args.get("date")) or date.today()
-    report_service: ReportService = current_app.extensions["report_service"]
-    summaries = report_service.grouped_summary(target_date)
-    
-    # Debug: Check if we have any summaries
-    current_app.logger.info(f"Reports for {target_date}: Found {len(summaries)} area summaries")
-    for summary in summaries:
-        current_app.logger.info(f"Area {summary.area}: {len(summary.events)} events")
+    if request.args.get("area"):
+        return _area_page(target_date, request.args["area"])
 
+    report_service: ReportService = current_app.extensions["report_service"]
     if request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json":
-        return jsonify({
-            "date": target_date.isoformat(),
-            "areas": [summary.as_dict() for summary in summaries],
-        })
+        report = report_service.daily_report(target_date)
+        response = jsonify(report.as_dict())
+        response.set_etag(report.etag)
+        response.last_modified = report.last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    # Only the first page of each area is rendered; the page loads the rest
+    movement_service: MovementService = current_app.extensions["movement_service"]
+    counts = report_service.counts_for_date(target_date)
+    page_size = _page_size(None)
+    summaries = []
+    next_cursors = {}
+    for area in counts:
+        events = movement_service.area_events(target_date, area, limit=page_size + 1)
+        if len(events) > page_size:
+            next_cursors[area] = _format_cursor(events[page_size - 1])
+        summaries.append(MovementSummary(area=area, events=events[:page_size]))
 
+    if current_app.logger.isEnabledFor(logging.DEBUG):
+        current_app.logger.debug("Reports for %s: %d area summaries", target_date, len(summaries))
+        for summary in summaries:
+            current_app.logger.debug("Area %s: %d events", summary.area, len(summary.events))
+
+    live = target_date == date.today()
     return render_template(
         "reports.html",
         target_date=target_date,
         summaries=summaries,
+        counts=counts,
+        next_cursors=next_cursors,
+        live=live,
+        last_event_id=movement_service.latest_event_id() if live else None,
     )
 
 
+def _area_page(target_date: date, area: str):
+    after = _parse_cursor(request.args.get("after"))
+    limit = _page_size(request.args.get("limit", type=int))
+
+    movement_service: MovementService = current_app.extensions["movement_service"]
+    events = movement_service.area_events(target_date, area, after=after, limit=limit + 1)
+    next_cursor = _format_cursor(events[limit - 1]) if len(events) > limit else None
+
+    return jsonify({
+        "date": target_date.isoformat(),
+        "area": area,
+        "events": [dict(event.as_dict(), id=event.id) for event in events[:limit]],
+        "next": next_cursor,
+    })
+
+
+def _page_size(requested: Optional[int]) -> int:
+    page_size = requested or current_app.config.get("REPORT_PAGE_SIZE", 200)
+    return max(1, min(page_size, current_app.config.get("REPORT_MAX_PAGE_SIZE", 1000)))
+
+
+def _range_report():
+    today = date.today()
+    end = _parse_date(request.args.get("to")) or today
+    start = _parse_date(request.args.get("from")) or end
+    if start > end:
+        start, end = end, start
+    max_days = current_app.config.get("REPORT_MAX_RANGE_DAYS", 400)
+    if (end - start).days + 1 > max_days:
+        abort(400, description=f"Date ranges are limited to {max_days} days.")
+
+    report_service: ReportService = current_app.extensions["report_service"]
+    rollups = report_service.range_summary(start, end)
+
+    if request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "areas": [rollup.as_dict() for rollup in rollups],
+        })
+
+    return render_template(
+        "reports-range.html",
+        start_date=start,
+        end_date=end,
+        rollups=rollups,
+    )
+
+
+@reports_bp.route("/person/<name>", methods=["GET"])
+def person(name: str):
+    directory: NameDirectory = current_app.extensions["name_directory"]
+    # Case and "Last, First" order are forgiven, typos are not: history must
+    # never be silently swapped for a similar name's
+    resolved = directory.canonical(name)
+    start = _parse_date(request.args.get("from"))
+    end = _parse_date(request.args.get("to"))
+    if start and end and start > end:
+        start, end = end, start
+    before = _parse_cursor(request.args.get("before"))
+    page_size = current_app.config.get("PERSON_HISTORY_PAGE_SIZE", 100)
+    limit = request.args.get("limit", type=int) or page_size
+    limit = max(1, min(limit, current_app.config.get("PERSON_HISTORY_MAX_PAGE_SIZE", 500)))
+
+    movement_service: MovementService = current_app.extensions["movement_service"]
+    # One extra row tells us whether there is an older page
+    events = movement_service.person_history(
+        resolved, start=start, end=end, before=before, limit=limit + 1
+    )
+    next_cursor = _format_cursor(events[limit - 1]) if len(events) > limit else None
+    events = events[:limit]
+
+    if request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "name": resolved,
+            "from": start.isoformat() if start else None,
+            "to": end.isoformat() if end else None,
+            "events": [event.as_dict() for event in events],
+            "next": next_cursor,
+        })
+
+    older_url = None
+    if next_cursor:
+        older_url = url_for(
+            "reports.person",
+            name=resolved,
+            before=next_cursor,
+            limit=limit if limit != page_size else None,
+            **{"from": request.args.get("from"), "to": request.args.get("to")},
+        )
+
+    return render_template(
+        "reports-person.html",
+        name=resolved,
+        start_date=start,
+        end_date=end,
+        events=events,
+        older_url=older_url,
+    )
+
+
+@reports_bp.route("/analytics", methods=["GET"])
+def analytics():
+    end = _parse_date(request.args.get("to")) or date.today()
+    default_days = current_app.config.get("ANALYTICS_DEFAULT_DAYS", 28)
+    start = _parse_date(request.args.get("from")) or end - timedelta(days=default_days - 1)
+    if start > end:
+        start, end = end, start
+    max_days = current_app.config.get("REPORT_MAX_RANGE_DAYS", 400)
+    if (end - start).days + 1 > max_days:
+        abort(400, description=f"Date ranges are limited to {max_days} days.")
+
+    analytics_service: AnalyticsService = current_app.extensions["analytics_service"]
+    report = analytics_service.report(start, end)
+
+    if request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify(report.as_dict())
+
+    return render_template(
+        "reports-analytics.html",
+        start_date=start,
+        end_date=end,
+        report=report,
+    )
+
+
+@reports_bp.route("/stream", methods=["GET"])
+def stream():
+    raw_last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    last_event_id = int(raw_last_id) if raw_last_id and raw_last_id.isdigit() else None
+
+    broadcaster: EventBroadcaster = current_app.extensions["event_broadcaster"]
+    retry_seconds = current_app.config.get("STREAM_RETRY_SECONDS", 30)
+    try:
+        subscriber, backlog = broadcaster.subscribe(last_event_id)
+    except StreamLimitReached:
+        # Leave the worker's remaining threads to the kiosks; the page reconnects later
+        response = current_app.response_class(
+            f"retry: {int(retry_seconds * 1000)}\n\n", status=503, mimetype="text/event-stream"
+        )
+        response.headers["Retry-After"] = str(int(retry_seconds))
+        return response
+    response = current_app.response_class(
+        broadcaster.stream(
+            subscriber,
+            backlog,
+            keepalive=current_app.config.get("STREAM_KEEPALIVE_SECONDS", 15),
+        ),
+        mimetype="text/event-stream",
+    )
+    # A client that leaves before the body starts never runs the generator's cleanup
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscriber))
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@reports_bp.route("/presence", methods=["GET"])
+def presence():
+    presence_index: PresenceIndex = current_app.extensions["presence_index"]
+    presence_index.catch_up()
+    occupants = presence_index.snapshot()
+
+    if request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "as_of": datetime.now().isoformat(timespec="seconds"),
+            "areas": {
+                area: [{"name": name, "since": since.isoformat()} for name, since in people]
+                for area, people in occupants.items()
+            },
+        })
+
+    return render_template("presence.html", occupants=occupants, as_of=datetime.now())
+
+
+@reports_bp.route("/stats", methods=["GET"])
+def stats():
+    target_date = _parse_date(request.args.get("date")) or date.today()
+    report_service: ReportService = current_app.extensions["report_service"]
+    return jsonify(report_service.stats(target_date))
+
+
+@reports_bp.route("/export.<any(csv, ndjson):fmt>", methods=["GET"])
+def export(fmt: str):
+    end = _parse_date(request.args.get("to")) or date.today()
+    start = _parse_date(request.args.get("from")) or end
+    if start > end:
+        start, end = end, start
+    areas = request.args.getlist("area")
+
+    movements: MovementService = current_app.extensions["movement_service"]
+    batches = movements.iter_event_rows(
+        start,
+        end,
+        areas=areas,
+        batch_size=current_app.config.get("EXPORT_BATCH_SIZE", 1000),
+    )
+    if fmt == "csv":
+        body, mimetype = _csv_lines(batches), "text/csv"
+    else:
+        body, mimetype = _ndjson_lines(batches), "application/x-ndjson"
+
+    filename = f"signin-events-{start.isoformat()}-to-{end.isoformat()}.{fmt}"
+    return current_app.response_class(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _csv_lines(batches) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        for event_id, recorded_at, area, name, direction, raw_input in rows:
+            writer.writerow(
+                (event_id, recorded_at.isoformat(), area, name, direction, raw_input or "")
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_lines(batches) -> Iterator[str]:
+    for rows in batches:
+        yield "".join(
+            json.dumps(
+                {
+                    "id": event_id,
+                    "recorded_at": recorded_at.isoformat(),
+                    "area": area,
+                    "name": name,
+                    "direction": direction,
+                    "raw_input": raw_input or "",
+                }
+            ) + "\n"
+            for event_id, recorded_at, area, name, direction, raw_input in rows
+        )
+
+
 @reports_bp.route("/logout", methods=["POST"])
 def logout():
     session.pop("reports_authenticated", None)
@@ -99,4 +379,18 @@ def _parse_date(raw: Optional[str]) -> Optional[date]:
         return None
 
 
+def _format_cursor(event: MovementRecord) -> str:
+    return f"{event.recorded_at.isoformat()}_{event.id}"
+
+
+def _parse_cursor(raw: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    if not raw:
+        return None
+    recorded_at, _, event_id = raw.rpartition("_")
+    try:
+        return datetime.fromisoformat(recorded_at), int(event_id)
+    except ValueError:
+        abort(400, description="Invalid page cursor.")
+
+
 __all__ = ["reports_bp"]
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import hmac
+
 from flask import (
     Blueprint,
+    Response,
+    abort,
     current_app,
     flash,
     redirect,
@@ -10,9 +14,15 @@ from flask import (
     session,
     url_for,
 )
+from sqlalchemy import text
 
+from ..extensions import db
+from ..services.broadcast import EventBroadcaster
 from ..services.movements import MovementService
 from ..services.directory import NameDirectory
+from ..services.metrics import Metrics
+from ..services.shells import PageShellCache
+from ..services.warmup import Warmup
 
 
 ui_bp = Blueprint("ui", __name__)
@@ -25,9 +35,56 @@ def inject_areas() -> dict[str, object]:
 
 @ui_bp.route("/healthz")
 def healthcheck() -> tuple[str, int]:
+    # Only report ready when this worker can reach the database and has warmed up
+    try:
+        db.session.execute(text("SELECT 1"))
+    except Exception:
+        current_app.logger.exception("Health check could not reach the database")
+        return "database unavailable", 503
+    warmup: Warmup = current_app.extensions["warmup"]
+    if not warmup.ready:
+        return warmup.error or "warming up", 503
     return "ok", 200
 
 
+@ui_bp.route("/metrics")
+def metrics() -> Response:
+    registry: Metrics | None = current_app.extensions.get("metrics")
+    if registry is None:
+        abort(404)
+    if not _metrics_allowed():
+        abort(401)
+
+    directory: NameDirectory = current_app.extensions["name_directory"]
+    movements: MovementService = current_app.extensions["movement_service"]
+    broadcaster: EventBroadcaster = current_app.extensions["event_broadcaster"]
+    gauges = {
+        "signin_directory_names": ("Names in the directory", directory.size),
+        "signin_directory_students": ("Students loaded from the roster CSV", directory.student_count),
+        "signin_events_stored": ("Sign-in events recorded, from the event counters", movements.total_events()),
+        "signin_suppressed_writes": ("Repeated sign-ins acknowledged without a write", movements.suppressed_writes),
+        "signin_report_streams": ("Live report streams open in this worker", broadcaster.subscriber_count),
+    }
+    warmup: Warmup = current_app.extensions["warmup"]
+    if warmup.ready:
+        gauges["signin_warmup_seconds"] = ("Time spent warming up after start", round(warmup.timings["total"], 3))
+    if movements.writer is not None:
+        stats = movements.writer.stats()
+        gauges["signin_group_commit_batches"] = ("Group commit transactions", stats["batches"])
+        gauges["signin_group_commit_events"] = ("Events written by group commit", stats["events"])
+        gauges["signin_group_commit_largest_batch"] = ("Largest group commit batch", stats["largest_batch"])
+    return Response(registry.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+def _metrics_allowed() -> bool:
+    # Same access as the reports, or the scrape token when one is configured
+    if "reports_authenticated" in session:
+        return True
+    token = current_app.config.get("METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+
+
 @ui_bp.route("/")
 def index():
     area = request.args.get("area")
@@ -61,7 +118,7 @@ def index():
         flash(f"Invalid area '{area}'. Please select a valid area.", "error")
 
     # Show area selection page
-    return render_template("area-select.html")
+    return _render_shell("area-select.html", ())
 
 
 @ui_bp.route("/signin", methods=["GET", "POST"])
@@ -85,15 +142,11 @@ def signin():
             flash("Please enter your name.", "error")
             return redirect(url_for("ui.signin"))
 
-        lowered = entry.lower()
-        if directory.has_name(entry):
-            person_name = entry
-        else:
-            person_name = None
+        person_name = directory.match(entry)
 
         if person_name:
             movements: MovementService = current_app.extensions["movement_service"]
-            current_app.logger.info(f"Recording event: {person_name} {direction} at {session['area']}")
+            current_app.logger.debug("Recording event: %s %s at %s", person_name, direction, session["area"])
             movements.record_event(
                 name=person_name,
                 area=session["area"],
@@ -107,7 +160,13 @@ def signin():
         flash("This name could not be matched. Try entering your name again.", "error")
         return redirect(url_for("ui.signin"))
 
-    return render_template(
-        "signin.html",
-        names=directory.names,
-    )
+    # Names are fetched from the search API, so the page never waits on the directory
+    return _render_shell("signin.html", (session["area"],))
+
+
+def _render_shell(template: str, key: tuple) -> Response:
+    # Pages carrying one-off flash messages are never shared
+    if session.get("_flashes"):
+        return current_app.make_response(render_template(template))
+    shells: PageShellCache = current_app.extensions["page_shells"]
+    return shells.respond(template, key)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 def _parse_list(raw: Optional[str]) -> List[str]:
@@ -19,6 +19,13 @@ def _parse_list(raw: Optional[str]) -> List[str]:
     return items
 
 
+def _parse_bool(raw: Optional[str], default: bool = False) -> bool:
+    """Parse a boolean flag such as 1/0, true/false or yes/no"""
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 @dataclass
 class BaseConfig:
     """Default application configuration."""
@@ -34,22 +41,135 @@ class BaseConfig:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = False
 
+    # PRAGMA statements applied to every new SQLite connection
+    SQLITE_PRAGMAS: Dict[str, object] = field(default_factory=dict)
+
+    # Group commit batches concurrent sign-ins into a single transaction
+    GROUP_COMMIT_ENABLED: bool = _parse_bool(os.getenv("GROUP_COMMIT_ENABLED"))
+    GROUP_COMMIT_INTERVAL_MS: int = int(os.getenv("GROUP_COMMIT_INTERVAL_MS", "10"))
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+
+    # Repeat sign-ins for the same person, area and direction within this many
+    # seconds are acknowledged without another write; 0 disables
+    SIGNIN_DEBOUNCE_SECONDS: float = float(os.getenv("SIGNIN_DEBOUNCE_SECONDS", "5"))
+    SIGNIN_DEBOUNCE_MAX_ENTRIES: int = int(os.getenv("SIGNIN_DEBOUNCE_MAX_ENTRIES", "4096"))
+
     # Names can be provided via file path or environment variable
     NAMES_FILE_PATH: Optional[str] = os.getenv("NAMES_FILE_PATH")
     NAMES_LIST: List[str] = field(
         default_factory=lambda: _parse_list(os.getenv("NAMES_LIST"))
     )
 
+    # Student roster with ID, card number, first name, last name and year level columns
+    STUDENT_CSV_PATH: Optional[str] = os.getenv("STUDENT_CSV_PATH")
+
+    # How often to check the names file for changes, 0 disables watching
+    NAMES_WATCH_SECONDS: float = float(os.getenv("NAMES_WATCH_SECONDS", "5"))
+
+    # Share of characters in a typed name that may be wrong before it is rejected
+    NAME_MATCH_ERROR_RATIO: float = float(os.getenv("NAME_MATCH_ERROR_RATIO", "0.2"))
+
+    # Name autocomplete suggestions
+    NAME_SEARCH_LIMIT: int = int(os.getenv("NAME_SEARCH_LIMIT", "8"))
+    NAME_SEARCH_MAX_LIMIT: int = int(os.getenv("NAME_SEARCH_MAX_LIMIT", "50"))
+
     AREAS: List[str] = field(
         default_factory=lambda: _parse_list(os.getenv("SIGNIN_AREAS"))
     )
 
+    # Cached daily reports; today's entry also expires so other workers' writes show up
+    REPORT_CACHE_SIZE: int = int(os.getenv("REPORT_CACHE_SIZE", "64"))
+    REPORT_CACHE_TODAY_TTL: int = int(os.getenv("REPORT_CACHE_TODAY_TTL", "30"))
+
+    # Live report stream; polling picks up events written by other worker processes
+    STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+    STREAM_HISTORY_SIZE: int = int(os.getenv("STREAM_HISTORY_SIZE", "1000"))
+    STREAM_POLL_SECONDS: float = float(os.getenv("STREAM_POLL_SECONDS", "0"))
+    # Open streams per worker, each holding a thread; above this they get 503 and retry
+    STREAM_MAX_CLIENTS: int = int(os.getenv("STREAM_MAX_CLIENTS", "4"))
+    STREAM_RETRY_SECONDS: float = float(os.getenv("STREAM_RETRY_SECONDS", "30"))
+
+    # Events per area rendered with the daily report and per page fetched after it
+    REPORT_PAGE_SIZE: int = int(os.getenv("REPORT_PAGE_SIZE", "200"))
+    REPORT_MAX_PAGE_SIZE: int = int(os.getenv("REPORT_MAX_PAGE_SIZE", "1000"))
+
+    # Load the name directory and presence index after start-up instead of before it
+    WARMUP_IN_BACKGROUND: bool = _parse_bool(os.getenv("WARMUP_IN_BACKGROUND"), default=True)
+
+    # Re-read the Vite manifest when it changes; always on under the debugger
+    VITE_RELOAD_MANIFEST: bool = _parse_bool(os.getenv("VITE_RELOAD_MANIFEST"))
+    # Rendered kiosk pages kept per area and directory version
+    PAGE_SHELL_CACHE_SIZE: int = int(os.getenv("PAGE_SHELL_CACHE_SIZE", "64"))
+
+    # Longest date range accepted by range reports
+    REPORT_MAX_RANGE_DAYS: int = int(os.getenv("REPORT_MAX_RANGE_DAYS", "400"))
+
+    # Events per page of a person's history, and the most a client may ask for
+    PERSON_HISTORY_PAGE_SIZE: int = int(os.getenv("PERSON_HISTORY_PAGE_SIZE", "100"))
+    PERSON_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("PERSON_HISTORY_MAX_PAGE_SIZE", "500"))
+
+    # Visits without a sign-out are closed at this time of day (HH:MM)
+    ANALYTICS_DAY_END: str = os.getenv("ANALYTICS_DAY_END", "16:00")
+    # Days covered by /reports/analytics when no range is given
+    ANALYTICS_DEFAULT_DAYS: int = int(os.getenv("ANALYTICS_DEFAULT_DAYS", "28"))
+    # Seconds a range including today is reused while visits are still open
+    ANALYTICS_TODAY_TTL: int = int(os.getenv("ANALYTICS_TODAY_TTL", "60"))
+
+    # Rows fetched per database round trip when streaming exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Most events a kiosk may upload in one offline batch
+    BATCH_MAX_EVENTS: int = int(os.getenv("BATCH_MAX_EVENTS", "500"))
+
+    # Events older than the retention period move to per-month gzip CSV files
+    # under ARCHIVE_DIR (DATA_DIR/archive by default); an interval of 0 leaves
+    # archiving to the archive-events command
+    ARCHIVE_DIR: Optional[str] = os.getenv("ARCHIVE_DIR")
+    ARCHIVE_RETENTION_DAYS: int = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+    ARCHIVE_INTERVAL_HOURS: float = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "0"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+    # Scheduled VACUUM locks the database, so it only runs in this local time
+    # window (HH:MM-HH:MM, may cross midnight); blank leaves it to the command
+    ARCHIVE_VACUUM_WINDOW: str = os.getenv("ARCHIVE_VACUUM_WINDOW", "01:00-05:00")
+
+    # Production server started by `python -m server serve`
+    SERVE_HOST: str = os.getenv("SERVE_HOST", "0.0.0.0")
+    SERVE_PORT: int = int(os.getenv("SERVE_PORT", "8080"))
+    SERVE_WORKERS: int = int(os.getenv("SERVE_WORKERS", "2"))
+    SERVE_THREADS: int = int(os.getenv("SERVE_THREADS", "8"))
+    SERVE_TIMEOUT: int = int(os.getenv("SERVE_TIMEOUT", "30"))
+    SERVE_GRACEFUL_TIMEOUT: int = int(os.getenv("SERVE_GRACEFUL_TIMEOUT", "20"))
+
+    # Prometheus metrics at /metrics; timings are kept per worker process
+    METRICS_ENABLED: bool = _parse_bool(os.getenv("METRICS_ENABLED", "true"))
+    # Lets scrapers read /metrics with "Authorization: Bearer <token>"; without
+    # it only a signed-in reports session can
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+
     # Authentication for reports access
     REPORT_USERNAME: Optional[str] = os.getenv("REPORT_USERNAME")
     REPORT_PASSWORD: Optional[str] = os.getenv("REPORT_PASSWORD")
     ACCESS_KEY: str = os.getenv("ACCESS_KEY")
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # "json" for one JSON object per line, "text" for plain lines
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+
+
+@dataclass
+class ProductionConfig(BaseConfig):
+    """Configuration tuned for concurrent kiosks on a SQLite database."""
+
+    SQLITE_PRAGMAS: Dict[str, object] = field(
+        default_factory=lambda: {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            # Negative values are a size in KiB rather than pages
+            "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000")),
+            "temp_store": "MEMORY",
+        }
+    )
 
 
 def load_config(config: Optional[str | type[BaseConfig]]) -> BaseConfig:
@@ -67,4 +187,4 @@ def load_config(config: Optional[str | type[BaseConfig]]) -> BaseConfig:
     return config
 
 
-__all__ = ["BaseConfig", "load_config"]
+__all__ = ["BaseConfig", "ProductionConfig", "load_config"]
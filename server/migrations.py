@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import func, inspect, select, text
+
+from .extensions import db
+from .models import DailyRollup, EventCounter, SignInEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema() -> None:
+    """Create missing tables and indexes on an existing database.
+
+    Must be called inside an application context.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        _add_missing_columns(inspector, table)
+
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info("Creating index %s on %s", index.name, table.name)
+                index.create(bind=db.engine)
+
+    if EventCounter.__tablename__ not in existing_tables:
+        _backfill_counters()
+    if DailyRollup.__tablename__ not in existing_tables:
+        _backfill_rollups()
+
+
+def _add_missing_columns(inspector, table) -> None:
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            logger.warning(
+                "Cannot add required column %s.%s automatically", table.name, column.name
+            )
+            continue
+        column_type = column.type.compile(dialect=db.engine.dialect)
+        logger.info("Adding column %s.%s", table.name, column.name)
+        with db.engine.begin() as connection:
+            connection.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+            )
+
+
+def _backfill_counters() -> None:
+    day = func.date(SignInEvent.recorded_at)
+    rows = db.session.execute(
+        select(day, SignInEvent.area, SignInEvent.direction, func.count())
+        .group_by(day, SignInEvent.area, SignInEvent.direction)
+    ).all()
+    if not rows:
+        return
+
+    logger.info("Backfilling %d event counters", len(rows))
+    db.session.add_all(
+        EventCounter(
+            day=_as_date(raw_day),
+            area=area,
+            direction=direction,
+            count=count,
+        )
+        for raw_day, area, direction, count in rows
+    )
+    db.session.commit()
+
+
+def _backfill_rollups() -> None:
+    # Aggregated in Python because hour extraction differs between databases
+    rollups: Counter = Counter()
+    rows = db.session.execute(
+        select(SignInEvent.recorded_at, SignInEvent.area, SignInEvent.direction)
+        .execution_options(yield_per=5000)
+    )
+    for recorded_at, area, direction in rows:
+        rollups[(recorded_at.date(), area, direction, recorded_at.hour)] += 1
+    if not rollups:
+        return
+
+    logger.info("Backfilling %d daily rollups", len(rollups))
+    db.session.add_all(
+        DailyRollup(day=day, area=area, direction=direction, hour=hour, count=count)
+        for (day, area, direction, hour), count in rollups.items()
+    )
+    db.session.commit()
+
+
+def _as_date(value: date | str) -> date:
+    # SQLite returns date() results as ISO strings
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+__all__ = ["upgrade_schema"]
@@ -7,6 +7,14 @@ from .extensions import db
 
 class SignInEvent(db.Model):
     __tablename__ = "signin_events"
+    __table_args__ = (
+        db.Index("ix_signin_events_recorded_at_area", "recorded_at", "area"),
+        db.Index("ix_signin_events_name_recorded_at", "name", "recorded_at"),
+        db.Index("ix_signin_events_area_recorded_at_id", "area", "recorded_at", "id"),
+        db.Index("ux_signin_events_idempotency_key", "idempotency_key", unique=True),
+        # Archiving deletes the newest rows of old days; never hand their ids out again
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -14,6 +22,8 @@ class SignInEvent(db.Model):
     direction = db.Column(db.String(3), nullable=False)
     recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
     raw_input = db.Column(db.String(255), nullable=True)
+    # Set by kiosks replaying offline sign-ins so retries are not stored twice
+    idempotency_key = db.Column(db.String(64), nullable=True)
 
     def as_dict(self) -> dict[str, str]:
         return {
@@ -25,4 +35,72 @@ class SignInEvent(db.Model):
         }
 
 
-__all__ = ["SignInEvent"]
+class EventCounter(db.Model):
+    """Running count of sign-in events per day, area and direction."""
+
+    __tablename__ = "signin_event_counters"
+
+    day = db.Column(db.Date, primary_key=True)
+    area = db.Column(db.String(128), primary_key=True)
+    direction = db.Column(db.String(3), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyRollup(db.Model):
+    """Event counts per day, area, direction and hour of day."""
+
+    __tablename__ = "signin_daily_rollups"
+
+    day = db.Column(db.Date, primary_key=True)
+    area = db.Column(db.String(128), primary_key=True)
+    direction = db.Column(db.String(3), primary_key=True)
+    hour = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyVisits(db.Model):
+    """Visits paired from a finished day's events, per day and area."""
+
+    __tablename__ = "signin_daily_visits"
+
+    day = db.Column(db.Date, primary_key=True)
+    area = db.Column(db.String(128), primary_key=True)
+    # The area's event count when the day was paired; a late upload changes it
+    events = db.Column(db.Integer, nullable=False, default=0)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+    inferred_ends = db.Column(db.Integer, nullable=False, default=0)
+    unmatched_outs = db.Column(db.Integer, nullable=False, default=0)
+    total_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    max_minutes = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class DailyDwell(db.Model):
+    """Visits per day and area by dwell time in whole minutes, rounded up."""
+
+    __tablename__ = "signin_daily_dwell"
+
+    day = db.Column(db.Date, primary_key=True)
+    area = db.Column(db.String(128), primary_key=True)
+    minutes = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyOccupancy(db.Model):
+    """Person-minutes spent in an area per day and hour of day."""
+
+    __tablename__ = "signin_daily_occupancy"
+
+    day = db.Column(db.Date, primary_key=True)
+    area = db.Column(db.String(128), primary_key=True)
+    hour = db.Column(db.Integer, primary_key=True)
+    minutes = db.Column(db.Float, nullable=False, default=0.0)
+
+
+__all__ = [
+    "DailyDwell",
+    "DailyOccupancy",
+    "DailyRollup",
+    "DailyVisits",
+    "EventCounter",
+    "SignInEvent",
+]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import gc
+import logging
+from typing import Dict, Optional
+
+from flask import Flask
+
+from . import start_background_tasks
+from .extensions import db
+from .log import configure_logging, stop_logging
+
+
+logger = logging.getLogger(__name__)
+
+# Live report polling used when several workers serve the stream
+MULTI_WORKER_POLL_SECONDS = 2.0
+
+
+def serve(
+    app: Flask,
+    *,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+) -> None:
+    """Run the app under gunicorn with a preloaded, forked worker pool"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as exc:
+        raise RuntimeError("gunicorn is required to serve in production") from exc
+
+    config = app.config
+    workers = max(workers or config.get("SERVE_WORKERS", 2), 1)
+    threads = max(threads or config.get("SERVE_THREADS", 8), 1)
+    max_streams = config.get("STREAM_MAX_CLIENTS", 0)
+    if not max_streams or max_streams >= threads:
+        # Every thread held by a live report is one kiosk sign-ins cannot use
+        logger.warning(
+            "STREAM_MAX_CLIENTS=%s lets live reports use all %d threads per worker", max_streams, threads
+        )
+    options: Dict[str, object] = {
+        "bind": f"{host or config.get('SERVE_HOST', '0.0.0.0')}:{port or config.get('SERVE_PORT', 8080)}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        # Built once in the master and shared copy-on-write by every worker
+        "preload_app": True,
+        "timeout": config.get("SERVE_TIMEOUT", 30),
+        "graceful_timeout": config.get("SERVE_GRACEFUL_TIMEOUT", 20),
+        "accesslog": "-",
+        "when_ready": lambda server: _freeze_startup_state(app),
+        "post_fork": lambda server, worker: prepare_worker(app, workers=workers),
+        "worker_exit": lambda server, worker: shutdown_worker(app),
+    }
+
+    class _Server(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Flask:
+            return app
+
+    logger.info("Serving on %s with %d workers x %d threads", options["bind"], workers, threads)
+    _Server().run()
+
+
+def _freeze_startup_state(app: Flask) -> None:
+    # Warm up on the master's only thread so workers share its indexes and
+    # cannot inherit a lock held by a thread that does not exist after fork
+    if not app.extensions["warmup"].run(app):
+        logger.warning("Warm-up failed in the master; each worker retries it")
+    # The log writer thread would be copied into every worker mid-write
+    configure_logging(
+        logging.getLogger().level,
+        json_format=app.config.get("LOG_FORMAT", "json") == "json",
+        queued=False,
+    )
+    # Keep the collector from touching (and so copying) objects built before fork
+    gc.collect()
+    gc.freeze()
+
+
+def prepare_worker(app: Flask, *, workers: int = 1) -> None:
+    """Reset state inherited from the master process in a new worker"""
+    # The log writer thread stayed behind in the master
+    level = logging.getLogger().level
+    configure_logging(level, json_format=app.config.get("LOG_FORMAT", "json") == "json")
+
+    with app.app_context():
+        # Pooled connections belong to the master; never share them across fork
+        db.engine.dispose(close=False)
+
+    poll_seconds = app.config.get("STREAM_POLL_SECONDS", 0)
+    if not poll_seconds and workers > 1:
+        # Each worker only hears its own writes without polling
+        poll_seconds = MULTI_WORKER_POLL_SECONDS
+    start_background_tasks(app, poll_seconds=poll_seconds)
+
+    with app.app_context():
+        app.extensions["presence_index"].catch_up()
+        db.session.remove()
+    # Only does anything when warm-up failed in the master; retries until it succeeds
+    app.extensions["warmup"].start(app)
+
+
+def shutdown_worker(app: Flask) -> None:
+    """Flush queued writes and stop background threads before a worker exits"""
+    writer = app.extensions["movement_service"].writer
+    if writer is not None:
+        writer.close()
+    app.extensions["name_directory"].stop_watching()
+    app.extensions["event_broadcaster"].stop_polling()
+    app.extensions["event_archive"].stop_schedule()
+    with app.app_context():
+        db.engine.dispose()
+    stop_logging()
+
+
+__all__ = ["prepare_worker", "serve", "shutdown_worker"]
@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import logging
+import math
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..models import DailyDwell, DailyOccupancy, DailyVisits
+from .cache import LRUCache
+from .movements import MovementService
+
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bounds in minutes of the dwell time histogram buckets
+DWELL_BUCKETS: Tuple[int, ...] = (5, 15, 30, 60, 120, 240)
+
+
+@dataclass(frozen=True, slots=True)
+class Visit:
+    name: str
+    area: str
+    started_at: datetime
+    ended_at: datetime
+    # False when no matching sign-out was recorded and the end was inferred
+    signed_out: bool
+
+    @property
+    def minutes(self) -> float:
+        return (self.ended_at - self.started_at).total_seconds() / 60
+
+
+@dataclass
+class AreaAnalytics:
+    area: str
+    visits: int = 0
+    inferred_ends: int = 0
+    unmatched_outs: int = 0
+    # Visits by dwell time in whole minutes, rounded up, for the histogram and percentiles
+    dwell_minutes: Counter = field(default_factory=Counter)
+    total_minutes: float = 0.0
+    max_minutes: float = 0.0
+    # Person-minutes spent in the area during each hour of the day
+    person_minutes: array = field(default_factory=lambda: array("d", [0.0] * 24))
+    days: int = 0
+
+    def add(self, visit: Visit) -> None:
+        minutes = visit.minutes
+        self.visits += 1
+        if not visit.signed_out:
+            self.inferred_ends += 1
+        self.dwell_minutes[math.ceil(minutes)] += 1
+        self.total_minutes += minutes
+        self.max_minutes = max(self.max_minutes, minutes)
+
+        # Seconds since midnight of the arrival; visits never span a day
+        started = visit.started_at
+        cursor = started.hour * 3600 + started.minute * 60 + started.second + started.microsecond / 1e6
+        end = min(cursor + minutes * 60, 86_400.0)
+        person_minutes = self.person_minutes
+        while cursor < end:
+            hour = int(cursor // 3600)
+            until = min((hour + 1) * 3600, end)
+            person_minutes[hour] += (until - cursor) / 60
+            cursor = until
+
+    @property
+    def dwell_histogram(self) -> List[int]:
+        # Bucket bounds are whole minutes, so rounding up keeps every visit in its bucket
+        histogram = [0] * (len(DWELL_BUCKETS) + 1)
+        for minutes, count in self.dwell_minutes.items():
+            histogram[bisect_left(DWELL_BUCKETS, minutes)] += count
+        return histogram
+
+    def as_dict(self) -> Dict[str, object]:
+        occupancy = self.occupancy()
+        peak_hour = max(range(24), key=occupancy.__getitem__) if self.visits else None
+        return {
+            "area": self.area,
+            "visits": self.visits,
+            "inferred_ends": self.inferred_ends,
+            "unmatched_outs": self.unmatched_outs,
+            "dwell_minutes": {
+                "mean": round(self.total_minutes / self.visits, 1) if self.visits else None,
+                "median": float(self._percentile(0.5)) if self.visits else None,
+                "p90": float(self._percentile(0.9)) if self.visits else None,
+                "max": round(self.max_minutes, 1) if self.visits else None,
+            },
+            "dwell_histogram": [
+                {"minutes": label, "visits": count}
+                for label, count in zip(dwell_labels(), self.dwell_histogram)
+            ],
+            "occupancy": {f"{hour:02d}": round(value, 2) for hour, value in enumerate(occupancy) if value},
+            "peak_hour": f"{peak_hour:02d}" if peak_hour is not None else None,
+        }
+
+    def occupancy(self) -> List[float]:
+        """Average number of people present during each hour of the day"""
+        days = max(self.days, 1)
+        return [minutes / 60 / days for minutes in self.person_minutes]
+
+    def _percentile(self, fraction: float) -> int:
+        # Resolved to the whole minute the visits are bucketed by
+        target = min(self.visits - 1, int(self.visits * fraction))
+        seen = 0
+        for minutes in sorted(self.dwell_minutes):
+            seen += self.dwell_minutes[minutes]
+            if seen > target:
+                return minutes
+        return max(self.dwell_minutes)
+
+
+@dataclass
+class AnalyticsReport:
+    start: date
+    end: date
+    days: int
+    areas: List[AreaAnalytics]
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "from": self.start.isoformat(),
+            "to": self.end.isoformat(),
+            "days": self.days,
+            "areas": [area.as_dict() for area in self.areas],
+        }
+
+
+class AnalyticsService:
+    """Pairs sign-ins with sign-outs into visits and summarises dwell time and occupancy.
+
+    Finished days are paired once and stored per day and area; only today and
+    days that gained late uploads since are paired from the raw events.
+    """
+
+    def __init__(
+        self,
+        *,
+        movement_service: MovementService,
+        areas: Sequence[str] | None = None,
+        day_end: time = time(16, 0),
+        cache_size: int = 16,
+        today_ttl: int = 60,
+    ) -> None:
+        self.movement_service = movement_service
+        self.areas = list(areas or [])
+        self.day_end = day_end
+        self.today_ttl = max(today_ttl, 1)
+        self._cache: LRUCache[Tuple, AnalyticsReport] = LRUCache(cache_size)
+
+    def report(self, start: date, end: date) -> AnalyticsReport:
+        """Analyse a date range inclusive, reusing the cached copy until the range changes"""
+        # Late offline uploads to past days bump the counters too, so they are
+        # seen by every worker without any invalidation
+        key = (start, end, self.movement_service.count_between(start, end), self._clock_key(end))
+        return self._cache.get_or_create(key, lambda: self._build(start, end))
+
+    def prepare(self, days: int) -> None:
+        """Pair and store the finished days of the last few days that are not stored yet"""
+        end = date.today() - timedelta(days=1)
+        start = end - timedelta(days=max(days, 1) - 1)
+        self._store_finished(start, end, self.movement_service.counts_by_day(start, end))
+
+    def _clock_key(self, end: date) -> Optional[int]:
+        now = datetime.now()
+        if end < now.date() or now.time() >= self.day_end:
+            return None
+        # Today's open visits run until now, so they go stale with the clock
+        return int(now.timestamp() // self.today_ttl)
+
+    def visits_between(self, start: date, end: date) -> List[Visit]:
+        visits: List[Visit] = []
+        self._pair(self._rows(start, end), visits.append, lambda area, at: None)
+        return visits
+
+    def _build(self, start: date, end: date) -> AnalyticsReport:
+        by_area: Dict[str, AreaAnalytics] = {area: AreaAnalytics(area=area) for area in self.areas}
+
+        def area_for(area: str) -> AreaAnalytics:
+            analytics = by_area.get(area)
+            if analytics is None:
+                analytics = by_area[area] = AreaAnalytics(area=area)
+            return analytics
+
+        def count_unmatched(area: str, at: datetime) -> None:
+            area_for(area).unmatched_outs += 1
+
+        counts = self.movement_service.counts_by_day(start, end)
+        today = date.today()
+        finished_end = min(end, today - timedelta(days=1))
+        if start <= finished_end:
+            self._store_finished(start, finished_end, counts)
+            self._add_stored(start, finished_end, area_for)
+        if end >= today:
+            # Today is still changing, so it is always paired from the events
+            self._pair(
+                self._rows(max(start, today), end),
+                lambda visit: area_for(visit.area).add(visit),
+                count_unmatched,
+            )
+
+        days = sum(1 for areas in counts.values() if any(areas.values()))
+        for analytics in by_area.values():
+            analytics.days = days
+
+        ordered = [by_area[area] for area in self.areas]
+        ordered.extend(analytics for area, analytics in sorted(by_area.items()) if area not in self.areas)
+        return AnalyticsReport(start=start, end=end, days=days, areas=ordered)
+
+    def _store_finished(self, start: date, end: date, counts: Dict[date, Dict[str, int]]) -> None:
+        """Pair the days in range whose stored visits are missing or predate an upload"""
+        from ..extensions import db
+
+        stored: Dict[date, Dict[str, int]] = {}
+        for day, area, events in db.session.execute(
+            select(DailyVisits.day, DailyVisits.area, DailyVisits.events)
+            .where(DailyVisits.day >= start)
+            .where(DailyVisits.day <= end)
+        ):
+            stored.setdefault(day, {})[area] = events
+        stale = sorted(
+            day for day, areas in counts.items() if start <= day <= end and stored.get(day) != areas
+        )
+        for run_start, run_end in _runs(stale):
+            self._store_days(run_start, run_end, counts)
+
+    def _store_days(self, start: date, end: date, counts: Dict[date, Dict[str, int]]) -> None:
+        from ..extensions import db
+
+        # Every area with events gets a row, so a stored day always matches its counters
+        buckets: Dict[Tuple[date, str], AreaAnalytics] = {
+            (day, area): AreaAnalytics(area=area)
+            for day, areas in counts.items()
+            if start <= day <= end
+            for area in areas
+        }
+
+        def bucket(day: date, area: str) -> AreaAnalytics:
+            analytics = buckets.get((day, area))
+            if analytics is None:
+                analytics = buckets[(day, area)] = AreaAnalytics(area=area)
+            return analytics
+
+        def count_unmatched(area: str, at: datetime) -> None:
+            bucket(at.date(), area).unmatched_outs += 1
+
+        self._pair(
+            self._rows(start, end),
+            lambda visit: bucket(visit.started_at.date(), visit.area).add(visit),
+            count_unmatched,
+        )
+
+        visits, dwell, occupancy = [], [], []
+        for (day, area), analytics in buckets.items():
+            visits.append(
+                {
+                    "day": day,
+                    "area": area,
+                    "events": counts.get(day, {}).get(area, 0),
+                    "visits": analytics.visits,
+                    "inferred_ends": analytics.inferred_ends,
+                    "unmatched_outs": analytics.unmatched_outs,
+                    "total_minutes": analytics.total_minutes,
+                    "max_minutes": analytics.max_minutes,
+                }
+            )
+            dwell.extend(
+                {"day": day, "area": area, "minutes": minutes, "count": count}
+                for minutes, count in analytics.dwell_minutes.items()
+            )
+            occupancy.extend(
+                {"day": day, "area": area, "hour": hour, "minutes": minutes}
+                for hour, minutes in enumerate(analytics.person_minutes)
+                if minutes
+            )
+
+        try:
+            for model in (DailyVisits, DailyDwell, DailyOccupancy):
+                db.session.execute(delete(model).where(model.day >= start).where(model.day <= end))
+            for model, rows in ((DailyVisits, visits), (DailyDwell, dwell), (DailyOccupancy, occupancy)):
+                if rows:
+                    db.session.execute(insert(model), rows)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same days first
+            db.session.rollback()
+            logger.debug("Visits for %s to %s were stored concurrently", start, end)
+
+    def _add_stored(self, start: date, end: date, area_for: Callable[[str], AreaAnalytics]) -> None:
+        from ..extensions import db
+
+        for area, visits, inferred_ends, unmatched_outs, total_minutes, max_minutes in db.session.execute(
+            select(
+                DailyVisits.area,
+                func.sum(DailyVisits.visits),
+                func.sum(DailyVisits.inferred_ends),
+                func.sum(DailyVisits.unmatched_outs),
+                func.sum(DailyVisits.total_minutes),
+                func.max(DailyVisits.max_minutes),
+            )
+            .where(DailyVisits.day >= start)
+            .where(DailyVisits.day <= end)
+            .group_by(DailyVisits.area)
+        ):
+            analytics = area_for(area)
+            analytics.visits += visits
+            analytics.inferred_ends += inferred_ends
+            analytics.unmatched_outs += unmatched_outs
+            analytics.total_minutes += total_minutes
+            analytics.max_minutes = max(analytics.max_minutes, max_minutes)
+
+        for area, minutes, count in db.session.execute(
+            select(DailyDwell.area, DailyDwell.minutes, func.sum(DailyDwell.count))
+            .where(DailyDwell.day >= start)
+            .where(DailyDwell.day <= end)
+            .group_by(DailyDwell.area, DailyDwell.minutes)
+        ):
+            area_for(area).dwell_minutes[minutes] += count
+
+        for area, hour, minutes in db.session.execute(
+            select(DailyOccupancy.area, DailyOccupancy.hour, func.sum(DailyOccupancy.minutes))
+            .where(DailyOccupancy.day >= start)
+            .where(DailyOccupancy.day <= end)
+            .group_by(DailyOccupancy.area, DailyOccupancy.hour)
+        ):
+            area_for(area).person_minutes[hour] += minutes
+
+    def _rows(self, start: date, end: date) -> Iterable[Tuple]:
+        for batch in self.movement_service.iter_event_rows(start, end, batch_size=10_000):
+            yield from batch
+
+    def _pair(
+        self,
+        rows: Iterable[Tuple],
+        emit: Callable[[Visit], None],
+        unmatched_out: Callable[[str, datetime], None],
+    ) -> None:
+        """Walk time-ordered rows once, keeping each person's open visit"""
+        open_visits: Dict[str, Tuple[str, datetime]] = {}
+        current_day: Optional[date] = None
+
+        for _, recorded_at, area, name, direction, _ in rows:
+            day = recorded_at.date()
+            if day != current_day:
+                # Nobody stays signed in overnight
+                for person, (open_area, since) in open_visits.items():
+                    emit(Visit(person, open_area, since, self._inferred_end(since), False))
+                open_visits.clear()
+                current_day = day
+
+            current = open_visits.get(name)
+            if direction == "IN":
+                if current is not None:
+                    if current[0] == area:
+                        # Signing in again keeps the original arrival
+                        continue
+                    # Moved on without signing out of the previous area
+                    emit(Visit(name, current[0], current[1], recorded_at, False))
+                open_visits[name] = (area, recorded_at)
+            elif current is not None and current[0] == area:
+                emit(Visit(name, area, current[1], recorded_at, True))
+                del open_visits[name]
+            else:
+                unmatched_out(area, recorded_at)
+
+        for person, (open_area, since) in open_visits.items():
+            emit(Visit(person, open_area, since, self._inferred_end(since), False))
+
+    def _inferred_end(self, started_at: datetime) -> datetime:
+        now = datetime.now()
+        if started_at.date() == now.date():
+            # Still in the area as far as we know
+            return max(started_at, min(now, datetime.combine(now.date(), self.day_end)))
+        end = datetime.combine(started_at.date(), self.day_end)
+        if end <= started_at:
+            end = datetime.combine(started_at.date() + timedelta(days=1), time.min)
+        return end
+
+
+def dwell_labels() -> List[str]:
+    labels = []
+    lower = 0
+    for upper in DWELL_BUCKETS:
+        labels.append(f"{lower}-{upper}")
+        lower = upper
+    labels.append(f"{lower}+")
+    return labels
+
+
+def _runs(days: Sequence[date]) -> Iterator[Tuple[date, date]]:
+    """Group sorted days into inclusive runs of consecutive days"""
+    run_start = previous = None
+    for day in days:
+        if previous is not None and day != previous + timedelta(days=1):
+            yield run_start, previous
+            run_start = None
+        if run_start is None:
+            run_start = day
+        previous = day
+    if run_start is not None:
+        yield run_start, previous
+
+
+__all__ = ["AnalyticsReport", "AnalyticsService", "AreaAnalytics", "Visit"]
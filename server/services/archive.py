@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import csv
+import fcntl
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Flask
+from sqlalchemy import delete, select, text
+
+from ..models import SignInEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Same column order as MovementService.iter_event_rows
+ARCHIVE_COLUMNS: Tuple[str, ...] = ("id", "recorded_at", "area", "name", "direction", "raw_input")
+# How often a pending VACUUM checks whether the quiet window has opened
+VACUUM_CHECK_SECONDS = 600.0
+
+
+class EventArchive:
+    """Per-month gzip CSV files holding events moved out of the database."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._manifest_path = self.directory / "manifest.json"
+        self._manifest_mtime: Optional[float] = None
+        self._horizon: Optional[date] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self._scheduler_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    @property
+    def horizon(self) -> Optional[date]:
+        """Every event before this date lives in the archive rather than the database"""
+        try:
+            mtime = self._manifest_path.stat().st_mtime
+        except OSError:
+            return None
+        # Another process may have archived since we last looked
+        if mtime != self._manifest_mtime:
+            manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+            self._horizon = date.fromisoformat(manifest["archived_before"])
+            self._manifest_mtime = mtime
+        return self._horizon
+
+    def covers(self, day: date) -> bool:
+        horizon = self.horizon
+        return horizon is not None and day < horizon
+
+    def path_for(self, year: int, month: int) -> Path:
+        return self.directory / f"signin-events-{year:04d}-{month:02d}.csv.gz"
+
+    def first_day(self) -> date:
+        """First day of the oldest archived month, or today when nothing is archived"""
+        months = sorted(self.directory.glob("signin-events-*.csv.gz"))
+        if not months:
+            return date.today()
+        year, month = months[0].name[len("signin-events-"):-len(".csv.gz")].split("-")
+        return date(int(year), int(month), 1)
+
+    def archive_before(self, cutoff: date, *, batch_size: int = 5000) -> int:
+        """Move events recorded before cutoff into the archive; needs an app context"""
+        from ..extensions import db
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        cutoff_at = datetime.combine(cutoff, datetime.min.time())
+        moved = 0
+        with self._locked():
+            while True:
+                rows = db.session.execute(
+                    select(
+                        SignInEvent.id,
+                        SignInEvent.recorded_at,
+                        SignInEvent.area,
+                        SignInEvent.name,
+                        SignInEvent.direction,
+                        SignInEvent.raw_input,
+                    )
+                    .where(SignInEvent.recorded_at < cutoff_at)
+                    .order_by(SignInEvent.recorded_at.asc(), SignInEvent.id.asc())
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                by_month: Dict[Tuple[int, int], List[Tuple]] = defaultdict(list)
+                for row in rows:
+                    by_month[(row[1].year, row[1].month)].append(row)
+                for (year, month), month_rows in by_month.items():
+                    self._append(self.path_for(year, month), month_rows)
+
+                # Files are synced before the rows go; a crash in between only
+                # leaves duplicates, which readers drop by id
+                db.session.execute(
+                    delete(SignInEvent).where(SignInEvent.id.in_([row[0] for row in rows]))
+                )
+                db.session.commit()
+                moved += len(rows)
+
+            horizon = self.horizon
+            if horizon is None or cutoff > horizon:
+                self._write_manifest(cutoff)
+        if moved:
+            logger.info("Archived %d events recorded before %s", moved, cutoff)
+        return moved
+
+    @staticmethod
+    def vacuum() -> None:
+        """Give space freed by archiving back to the filesystem"""
+        from ..extensions import db
+
+        if db.engine.dialect.name != "sqlite":
+            return
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+
+    def iter_rows(
+        self,
+        start: date,
+        end: date,
+        *,
+        areas: Sequence[str] | None = None,
+        names: Sequence[str] | None = None,
+        reverse: bool = False,
+    ) -> Iterator[Tuple]:
+        """Yield archived rows between two dates inclusive in time order, newest
+        first when reverse; each month is only read once the previous is used up"""
+        # ISO timestamps compare as strings, so rows are filtered before parsing
+        start_key = start.isoformat()
+        end_key = (end + timedelta(days=1)).isoformat()
+        wanted = set(areas) if areas else None
+        wanted_names = set(names) if names else None
+
+        def keep(row: List[str]) -> bool:
+            return (
+                start_key <= row[1] < end_key
+                and (wanted is None or row[2] in wanted)
+                and (wanted_names is None or row[3] in wanted_names)
+            )
+
+        months: List[Tuple[int, int]] = []
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        if reverse:
+            months.reverse()
+
+        for year, month in months:
+            path = self.path_for(year, month)
+            if path.exists():
+                rows = list(self._read(path, keep))
+                # Late offline uploads can be appended after newer events
+                rows.sort(key=lambda row: (row[1], row[0]), reverse=reverse)
+                yield from rows
+
+    def start_schedule(
+        self,
+        app: Flask,
+        *,
+        interval: float,
+        retention_days: int,
+        vacuum_window: Optional[Tuple[time, time]] = None,
+    ) -> None:
+        """Archive events older than retention_days every interval seconds,
+        compacting the database afterwards only inside vacuum_window"""
+        if interval <= 0 or retention_days <= 0:
+            return
+        # Threads do not survive fork, so each worker process starts its own
+        if self._scheduler is not None and self._scheduler_pid == os.getpid():
+            return
+        self._scheduler_pid = os.getpid()
+        self._scheduler = threading.Thread(
+            target=self._run_schedule,
+            args=(app, interval, retention_days, vacuum_window),
+            name="event-archiver",
+            daemon=True,
+        )
+        self._scheduler.start()
+
+    def stop_schedule(self) -> None:
+        self._stop.set()
+
+    def _run_schedule(
+        self,
+        app: Flask,
+        interval: float,
+        retention_days: int,
+        vacuum_window: Optional[Tuple[time, time]],
+    ) -> None:
+        from ..extensions import db
+
+        next_archive = datetime.now() + timedelta(seconds=interval)
+        vacuum_pending = False
+        while not self._stop.wait(min(interval, VACUUM_CHECK_SECONDS)):
+            with app.app_context():
+                try:
+                    if datetime.now() >= next_archive:
+                        next_archive = datetime.now() + timedelta(seconds=interval)
+                        cutoff = date.today() - timedelta(days=retention_days)
+                        if self.archive_before(
+                            cutoff, batch_size=app.config.get("ARCHIVE_BATCH_SIZE", 5000)
+                        ):
+                            vacuum_pending = True
+                    # VACUUM locks the whole database, so it waits for the quiet hours
+                    if vacuum_pending and in_window(vacuum_window, datetime.now().time()):
+                        vacuum_pending = False
+                        self.vacuum()
+                except BlockingIOError:
+                    # Another worker is already archiving
+                    pass
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Scheduled archiving failed")
+                finally:
+                    db.session.remove()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.directory / ".lock", "w") as handle:
+            # Raises BlockingIOError while another process is archiving
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _append(path: Path, rows: Sequence[Tuple]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not path.exists():
+            writer.writerow(ARCHIVE_COLUMNS)
+        for event_id, recorded_at, area, name, direction, raw_input in rows:
+            writer.writerow((event_id, recorded_at.isoformat(), area, name, direction, raw_input or ""))
+        # Each append adds a gzip member; readers see one continuous file
+        with open(path, "ab") as handle:
+            handle.write(gzip.compress(buffer.getvalue().encode("utf-8")))
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    @staticmethod
+    def _read(path: Path, keep: Optional[Callable[[List[str]], bool]] = None) -> Iterator[Tuple]:
+        seen = set()
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as handle:
+            for row in csv.reader(handle):
+                if not row or row[0] == ARCHIVE_COLUMNS[0]:
+                    continue
+                if keep is not None and not keep(row):
+                    continue
+                # Ids can be reused by SQLite once the newest rows are archived,
+                # so a copy is only a duplicate when its time matches too
+                key = (row[0], row[1])
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield (
+                    int(row[0]),
+                    datetime.fromisoformat(row[1]),
+                    row[2],
+                    row[3],
+                    row[4],
+                    row[5] or None,
+                )
+
+    def _write_manifest(self, horizon: date) -> None:
+        temporary = self._manifest_path.with_suffix(".tmp")
+        temporary.write_text(
+            json.dumps({"archived_before": horizon.isoformat()}) + "\n", encoding="utf-8"
+        )
+        os.replace(temporary, self._manifest_path)
+
+
+def parse_window(value: Optional[str]) -> Optional[Tuple[time, time]]:
+    """Parse "HH:MM-HH:MM" into start and end times; blank means no window"""
+    if not value or not value.strip():
+        return None
+    start, _, end = value.partition("-")
+    return time.fromisoformat(start.strip()), time.fromisoformat(end.strip())
+
+
+def in_window(window: Optional[Tuple[time, time]], moment: time) -> bool:
+    if window is None:
+        return False
+    start, end = window
+    if start <= end:
+        return start <= moment < end
+    # The window runs past midnight
+    return moment >= start or moment < end
+
+
+__all__ = ["ARCHIVE_COLUMNS", "EventArchive", "in_window", "parse_window"]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from flask import Flask
+from sqlalchemy import func, select
+
+from ..models import SignInEvent
+
+
+logger = logging.getLogger(__name__)
+
+
+class StreamLimitReached(RuntimeError):
+    """Raised when a worker already holds its maximum number of open streams."""
+
+
+class EventBroadcaster:
+    """Fans committed sign-in events out to live report subscribers."""
+
+    def __init__(
+        self,
+        *,
+        history_size: int = 1000,
+        subscriber_queue_size: int = 1000,
+        max_subscribers: int = 0,
+    ) -> None:
+        self.history_size = max(history_size, 1)
+        self.subscriber_queue_size = subscriber_queue_size
+        # Each open stream holds a worker thread, 0 leaves them unbounded
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._history: OrderedDict[int, str] = OrderedDict()
+        self._subscribers: List[queue.Queue] = []
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def publish(self, events: Sequence[SignInEvent]) -> None:
+        self._publish_rows(
+            (event.id, event.name, event.area, event.direction, event.recorded_at)
+            for event in events
+        )
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[queue.Queue, List[Tuple[int, str]]]:
+        """Register a subscriber and return the events it missed since last_event_id"""
+        subscriber: queue.Queue = queue.Queue(self.subscriber_queue_size)
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                raise StreamLimitReached(f"{len(self._subscribers)} streams already open")
+            self._subscribers.append(subscriber)
+            if last_event_id is None:
+                return subscriber, []
+            oldest = next(iter(self._history), None)
+            backlog = [
+                (event_id, payload)
+                for event_id, payload in self._history.items()
+                if event_id > last_event_id
+            ]
+        if oldest is None or last_event_id < oldest - 1:
+            # The buffer does not reach back far enough, read the gap instead
+            backlog = self._load_since(last_event_id)
+        return subscriber, backlog
+
+    def _load_since(self, last_event_id: int) -> List[Tuple[int, str]]:
+        from ..extensions import db
+
+        rows = db.session.execute(
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+            )
+            .where(SignInEvent.id > last_event_id)
+            .order_by(SignInEvent.id.asc())
+            .limit(self.history_size)
+        ).all()
+        return [(row[0], _serialize(*row)) for row in rows]
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _is_subscribed(self, subscriber: queue.Queue) -> bool:
+        with self._lock:
+            return subscriber in self._subscribers
+
+    def stream(
+        self,
+        subscriber: queue.Queue,
+        backlog: Sequence[Tuple[int, str]],
+        *,
+        keepalive: float = 15.0,
+    ) -> Iterator[str]:
+        """Yield Server-Sent Events text until the client disconnects"""
+        sent = set()
+        try:
+            yield f"retry: {int(keepalive * 1000)}\n\n"
+            for event_id, payload in backlog:
+                sent.add(event_id)
+                yield _format_event(event_id, payload)
+            while True:
+                try:
+                    event_id, payload = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    if not self._is_subscribed(subscriber):
+                        # Dropped for falling behind, the client resumes on reconnect
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if event_id not in sent:
+                    yield _format_event(event_id, payload)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def start_polling(self, app: Flask, interval: float) -> None:
+        """Pick up events committed by other processes every interval seconds"""
+        if interval <= 0:
+            return
+        # Threads do not survive fork, so each worker process starts its own
+        if self._poll_thread is not None and self._poll_pid == os.getpid():
+            return
+        self._poll_pid = os.getpid()
+        self._poll_thread = threading.Thread(
+            target=self._poll, args=(app, interval), name="event-broadcast-poller", daemon=True
+        )
+        self._poll_thread.start()
+
+    def stop_polling(self) -> None:
+        self._stop.set()
+
+    def _poll(self, app: Flask, interval: float) -> None:
+        from ..extensions import db
+
+        with app.app_context():
+            cursor = db.session.execute(select(func.max(SignInEvent.id))).scalar() or 0
+            db.session.remove()
+        while not self._stop.wait(interval):
+            with app.app_context():
+                try:
+                    rows = db.session.execute(
+                        select(
+                            SignInEvent.id,
+                            SignInEvent.name,
+                            SignInEvent.area,
+                            SignInEvent.direction,
+                            SignInEvent.recorded_at,
+                        )
+                        .where(SignInEvent.id > cursor)
+                        .order_by(SignInEvent.id.asc())
+                    ).all()
+                except Exception:
+                    logger.exception("Polling for new events failed")
+                    continue
+                finally:
+                    db.session.remove()
+            if rows:
+                cursor = rows[-1][0]
+                self._publish_rows(rows)
+
+    def _publish_rows(self, rows) -> None:
+        with self._lock:
+            for event_id, name, area, direction, recorded_at in rows:
+                # Events seen locally and again by the poller are only sent once
+                if event_id is None or event_id in self._history:
+                    continue
+                payload = _serialize(event_id, name, area, direction, recorded_at)
+                self._history[event_id] = payload
+                while len(self._history) > self.history_size:
+                    self._history.popitem(last=False)
+                for subscriber in list(self._subscribers):
+                    try:
+                        subscriber.put_nowait((event_id, payload))
+                    except queue.Full:
+                        # A stalled client is dropped and resumes on reconnect
+                        self._subscribers.remove(subscriber)
+
+
+def _serialize(event_id: int, name: str, area: str, direction: str, recorded_at) -> str:
+    return json.dumps({
+        "id": event_id,
+        "name": name,
+        "area": area,
+        "direction": direction,
+        "recorded_at": recorded_at.isoformat(),
+    })
+
+
+def _format_event(event_id: int, payload: str) -> str:
+    return f"id: {event_id}\nevent: movement\ndata: {payload}\n\n"
+
+
+__all__ = ["EventBroadcaster", "StreamLimitReached"]
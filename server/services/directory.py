@@ -1,8 +1,103 @@
 from __future__ import annotations
 
+import csv
+import hashlib
 import logging
+import os
+import re
+import sys
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .matching import NameMatcher, fold
+
+
+logger = logging.getLogger(__name__)
+
+# Accepted spellings of each student CSV column, compared without punctuation
+STUDENT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "student_id": ("id", "studentid", "studentnumber", "studentno"),
+    "card_number": ("card", "cardnumber", "cardno", "cardid", "barcode"),
+    "first_name": ("firstname", "first", "givenname", "preferredname"),
+    "last_name": ("lastname", "last", "surname", "familyname"),
+    "year_level": ("year", "yearlevel", "grade", "yeargroup"),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Student:
+    student_id: str
+    card_number: str
+    first_name: str
+    last_name: str
+    year_level: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.first_name} {self.last_name}".strip()
+
+
+class _DirectoryIndex:
+    """Immutable lookup structures built from one version of the directory."""
+
+    __slots__ = (
+        "names",
+        "sorted_names",
+        "token_keys",
+        "token_refs",
+        "matcher",
+        "students",
+        "by_card",
+        "by_student_id",
+        "mtime",
+        "version",
+    )
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        students: Iterable[Student] = (),
+        mtime: Optional[Tuple] = None,
+        max_error_ratio: float = 0.2,
+    ) -> None:
+        self.students: Tuple[Student, ...] = tuple(students)
+        # Both indexes point at positions in the one students tuple
+        self.by_card: Dict[str, int] = {}
+        self.by_student_id: Dict[str, int] = {}
+        for position, student in enumerate(self.students):
+            if student.card_number:
+                self.by_card[_normalize_code(student.card_number)] = position
+            if student.student_id:
+                self.by_student_id[_normalize_code(student.student_id)] = position
+
+        self.names: FrozenSet[str] = frozenset(names).union(
+            student.name for student in self.students if student.name
+        )
+        self.mtime = mtime
+        self.matcher = NameMatcher(self.names, max_error_ratio=max_error_ratio)
+        self.sorted_names: List[str] = sorted(
+            self.names, key=lambda name: (name.lower(), name)
+        )
+        tokens: List[Tuple[str, int]] = []
+        for position, name in enumerate(self.sorted_names):
+            for token in set(fold(name).split()):
+                tokens.append((token, position))
+        tokens.sort()
+        self.token_keys: List[str] = [token for token, _ in tokens]
+        self.token_refs: List[int] = [position for _, position in tokens]
+        # Same contents give the same version in every worker process
+        digest = hashlib.sha1("\n".join(self.sorted_names).encode("utf-8"))
+        for student in self.students:
+            digest.update(f"\n{student.student_id}\t{student.card_number}".encode("utf-8"))
+        self.version: str = digest.hexdigest()[:16]
+
+    def token_range(self, term: str) -> Tuple[int, int]:
+        keys = self.token_keys
+        low = bisect_left(keys, term)
+        return low, bisect_left(keys, term + "\U0010ffff", low)
 
 
 class NameDirectory:
@@ -12,46 +107,301 @@ class NameDirectory:
         self,
         names_file_path: Optional[str] = None,
         names_list: Optional[List[str]] = None,
+        match_error_ratio: float = 0.2,
+        students_csv_path: Optional[str] = None,
+        lazy: bool = False,
     ) -> None:
         self.names_file_path = Path(names_file_path) if names_file_path else None
+        self.students_csv_path = Path(students_csv_path) if students_csv_path else None
         self.names_list = names_list or []
-        self._names: Set[str] = set()
-        self.reload()
+        self.match_error_ratio = match_error_ratio
+        self._loaded: Optional[_DirectoryIndex] = None
+        # Published ahead of the full index on first load, so exact names match early
+        self._exact_names: FrozenSet[str] = frozenset()
+        self._names_read = threading.Event()
+        self._reload_lock = threading.Lock()
+        # Source mtimes that last failed to read, so the watcher waits for the next write
+        self._failed_mtime: Optional[Tuple[Optional[float], ...]] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_pid: Optional[int] = None
+        self._stop = threading.Event()
+        if not lazy:
+            self.reload()
+
+    @property
+    def _index(self) -> _DirectoryIndex:
+        index = self._loaded
+        if index is None:
+            # First use before warm-up finished; wait for (or do) the load
+            index = self.warm()
+        return index
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded is not None
+
+    def warm(self) -> _DirectoryIndex:
+        """Load the directory unless it already is"""
+        with self._reload_lock:
+            try:
+                if self._loaded is None:
+                    self._load()
+            finally:
+                self._names_read.set()
+            return self._loaded
 
     def reload(self) -> None:
-        self._names.clear()
+        """Build a new index and swap it in; readers never see a partial one"""
+        with self._reload_lock:
+            try:
+                self._load()
+            finally:
+                self._names_read.set()
+
+    def _load(self) -> None:
+        # Callers hold the reload lock
+        mtime = self._source_mtimes()
+        names: Set[str] = set()
 
         # Load from names from environment
         for name in self.names_list:
             normalized = self._normalize_name(name)
             if normalized:
-                self._names.add(normalized)
-
-        # Load from names from file
-        if self.names_file_path and self.names_file_path.exists():
-            self._load_names_file()
+                names.add(normalized)
 
-    def _load_names_file(self) -> None:
-        """Load names from file"""
+        # A source that loaded before and now fails to read, or has gone missing,
+        # is most likely mid-write; keep serving the current index until it settles
+        loaded_mtime = (self._loaded.mtime or ()) if self._loaded is not None else ()
+        students: List[Student] = []
         try:
-            with self.names_file_path.open(encoding="utf-8-sig") as handle:
-                content = handle.read()
-                # Handle comma and newline separation
-                for line in content.replace(",", "\n").split("\n"):
-                    name = line.strip()
-                    if name:
-                        normalized = self._normalize_name(name)
-                        if normalized:
-                            self._names.add(normalized)
-        except Exception as e:
-            logging.getLogger(__name__).warning("Failed to load names file %s: %s", self.names_file_path, e)
+            if self._should_read(self.names_file_path, 0, mtime, loaded_mtime):
+                self._load_names_file(names)
+            if self._should_read(self.students_csv_path, 1, mtime, loaded_mtime):
+                students = self._load_students_csv()
+        except (OSError, UnicodeError, csv.Error, ValueError) as e:
+            self._failed_mtime = mtime
+            if self._loaded is not None:
+                logger.error("Keeping the current name directory: %s", e)
+                return
+            logger.error("Failed to read the name directory sources: %s", e)
+        else:
+            self._failed_mtime = None
+
+        if self._loaded is None:
+            self._exact_names = frozenset(names).union(
+                student.name for student in students if student.name
+            )
+            self._names_read.set()
+
+        previous = self._loaded or _DirectoryIndex(())
+        index = self._loaded = _DirectoryIndex(
+            names,
+            students,
+            mtime=mtime,
+            max_error_ratio=self.match_error_ratio,
+        )
+        self._exact_names = frozenset()
+
+        added = index.names - previous.names
+        removed = previous.names - index.names
+        if added or removed:
+            logger.info(
+                "Name directory reloaded: %d names, %d added, %d removed",
+                len(index.names),
+                len(added),
+                len(removed),
+            )
+            logger.debug("Added names: %s", sorted(added))
+            logger.debug("Removed names: %s", sorted(removed))
+
+    def reload_if_changed(self) -> bool:
+        """Reload when a source file has been modified since the last load"""
+        mtime = self._source_mtimes()
+        if mtime == self._index.mtime or mtime == self._failed_mtime:
+            return False
+        self.reload()
+        return True
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the source files for changes every interval seconds"""
+        if interval <= 0 or not (self.names_file_path or self.students_csv_path):
+            return
+        # Threads do not survive fork, so each worker process starts its own
+        if self._watcher is not None and self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="name-directory-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception:
+                logger.exception("Failed to reload the name directory")
+
+    @staticmethod
+    def _should_read(
+        path: Optional[Path],
+        position: int,
+        mtime: Tuple[Optional[float], ...],
+        loaded_mtime: Tuple[Optional[float], ...],
+    ) -> bool:
+        # Read a source that exists now or existed at the last load
+        if path is None:
+            return False
+        if mtime[position] is not None:
+            return True
+        return position < len(loaded_mtime) and loaded_mtime[position] is not None
+
+    def _source_mtimes(self) -> Tuple[Optional[float], ...]:
+        mtimes: List[Optional[float]] = []
+        for path in (self.names_file_path, self.students_csv_path):
+            try:
+                mtimes.append(path.stat().st_mtime if path else None)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _load_names_file(self, names: Set[str]) -> None:
+        """Load names from file; raises when it cannot be read"""
+        with self.names_file_path.open(encoding="utf-8-sig") as handle:
+            content = handle.read()
+        found = 0
+        # Handle comma and newline separation
+        for line in content.replace(",", "\n").split("\n"):
+            name = line.strip()
+            if name:
+                normalized = self._normalize_name(name)
+                if normalized:
+                    names.add(normalized)
+                    found += 1
+        if not found:
+            raise ValueError(f"names file {self.names_file_path} is empty")
+
+    def _load_students_csv(self) -> List[Student]:
+        """Stream students from a CSV with a header row; raises when it cannot be read"""
+        students: List[Student] = []
+        with self.students_csv_path.open(encoding="utf-8-sig", newline="") as handle:
+            reader = csv.reader(handle)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"students file {self.students_csv_path} is empty")
+            columns = _student_columns(header)
+            if "first_name" not in columns and "last_name" not in columns:
+                raise ValueError(
+                    f"students file {self.students_csv_path} has no name columns"
+                )
+            for row in reader:
+                values = {
+                    field: row[position].strip()
+                    for field, position in columns.items()
+                    if position < len(row)
+                }
+                student = Student(
+                    student_id=values.get("student_id", ""),
+                    card_number=values.get("card_number", ""),
+                    first_name=values.get("first_name", ""),
+                    last_name=values.get("last_name", ""),
+                    # Year levels repeat across the roster, so share one string each
+                    year_level=sys.intern(values.get("year_level", "")),
+                )
+                if student.name:
+                    students.append(student)
+        return students
+
+    def lookup_card(self, code: str) -> Optional[Student]:
+        """Find a student by card number or student ID"""
+        index = self._index
+        key = _normalize_code(code)
+        position = index.by_card.get(key)
+        if position is None:
+            position = index.by_student_id.get(key)
+        return index.students[position] if position is not None else None
 
     def has_name(self, name: str) -> bool:
-        return name in self._names
+        return name in self._index.names
+
+    def match(self, entry: str) -> Optional[str]:
+        """Resolve typed input to a directory name, tolerating case, accents,
+        "Last, First" order and small typos; None when missing or ambiguous"""
+        if self._loaded is None:
+            if self._reload_lock.locked():
+                # Names are read long before the fuzzy index is built
+                self._names_read.wait()
+            if entry in self._exact_names:
+                # Still building the fuzzy index; an exact name does not need it
+                return entry
+        index = self._index
+        if entry in index.names:
+            return entry
+        if index.students:
+            student = self.lookup_card(entry)
+            if student is not None:
+                return student.name
+        return index.matcher.match(entry)
+
+    def canonical(self, entry: str) -> str:
+        """Directory spelling of a name, or the name in "First Last" order
+        when it is not (or no longer) in the directory. Never corrects typos,
+        so a former student's name is not swapped for a similar current one"""
+        index = self._index
+        if entry in index.names:
+            return entry
+        return index.matcher.exact(entry) or self._normalize_name(entry)
+
+    def search(self, query: str, limit: int = 8) -> List[str]:
+        """Return names where every query word prefixes a word of the name"""
+        terms = fold(query).split()
+        if not terms or limit <= 0:
+            return []
+
+        index = self._index
+        # Each term maps to a contiguous slice of the sorted token keys
+        ranges = sorted(
+            (index.token_range(term) for term in set(terms)),
+            key=lambda bounds: bounds[1] - bounds[0],
+        )
+        refs = index.token_refs
+
+        if len(ranges) == 1:
+            low, high = ranges[0]
+            positions: Set[int] = set()
+            for position in range(low, high):
+                positions.add(refs[position])
+                if len(positions) >= limit:
+                    break
+        else:
+            low, high = ranges[0]
+            positions = set(refs[low:high])
+            for low, high in ranges[1:]:
+                if not positions:
+                    break
+                positions.intersection_update(refs[low:high])
+
+        return [index.sorted_names[position] for position in sorted(positions)[:limit]]
 
     @property
     def names(self) -> List[str]:
-        return sorted(self._names)
+        return self._index.sorted_names
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a reload changes the names or students"""
+        return self._index.version
+
+    @property
+    def size(self) -> int:
+        return len(self._index.names)
+
+    @property
+    def student_count(self) -> int:
+        return len(self._index.students)
 
     @staticmethod
     def _normalize_name(raw_name: str) -> str:
@@ -61,4 +411,19 @@ class NameDirectory:
         return raw_name.strip()
 
 
-__all__ = ["NameDirectory"]
+def _normalize_code(code: str) -> str:
+    return "".join(code.split()).upper()
+
+
+def _student_columns(header: List[str]) -> Dict[str, int]:
+    """Map student fields to column positions using the header row"""
+    positions: Dict[str, int] = {}
+    for position, title in enumerate(header):
+        normalized = re.sub(r"[^a-z0-9]", "", title.lower())
+        for field, aliases in STUDENT_COLUMNS.items():
+            if normalized in aliases and field not in positions:
+                positions[field] = position
+    return positions
+
+
+__all__ = ["NameDirectory", "Student"]
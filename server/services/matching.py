@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+
+_APOSTROPHES = re.compile(r"['’`]")
+_SEPARATORS = re.compile(r"[^\w\s]|_")
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip diacritics and punctuation, and collapse whitespace"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = _SEPARATORS.sub(" ", _APOSTROPHES.sub("", stripped.casefold()))
+    return " ".join(cleaned.split())
+
+
+def swap_last_first(text: str) -> str:
+    """Turn "Last, First" into "First Last"; other input is returned stripped"""
+    if "," in text:
+        last, first = [part.strip() for part in text.split(",", 1)]
+        return f"{first} {last}".strip()
+    return text.strip()
+
+
+def _sorted_tokens(key: str) -> str:
+    return " ".join(sorted(key.split()))
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(left: str, right: str, limit: int) -> int:
+    """Damerau (optimal string alignment) distance, capped at limit + 1"""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+    previous_row: List[int] = []
+    row = list(range(len(right) + 1))
+    for i in range(1, len(left) + 1):
+        before, previous_row = previous_row, row
+        row = [i] + [0] * len(right)
+        best = i
+        for j in range(1, len(right) + 1):
+            cost = 0 if left[i - 1] == right[j - 1] else 1
+            value = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if (
+                i > 1
+                and j > 1
+                and left[i - 1] == right[j - 2]
+                and left[i - 2] == right[j - 1]
+            ):
+                value = min(value, before[j - 2] + 1)
+            row[j] = value
+            best = min(best, value)
+        if best > limit:
+            return limit + 1
+    return row[-1]
+
+
+class NameMatcher:
+    """Resolves loosely typed input to a single directory name."""
+
+    def __init__(self, names: Iterable[str], *, max_error_ratio: float = 0.2) -> None:
+        self.max_error_ratio = max_error_ratio
+        self._names: List[str] = sorted(names)
+        self._folded: List[str] = []
+        self._by_key: Dict[str, List[int]] = {}
+        self._by_tokens: Dict[str, List[int]] = {}
+        trigram_lists: Dict[str, List[int]] = {}
+
+        for position, name in enumerate(self._names):
+            key = fold(name)
+            self._folded.append(key)
+            self._by_key.setdefault(key, []).append(position)
+            self._by_tokens.setdefault(_sorted_tokens(key), []).append(position)
+            for trigram in _trigrams(key):
+                trigram_lists.setdefault(trigram, []).append(position)
+
+        # Compact posting lists keep a 50k name directory to a few megabytes
+        self._trigrams: Dict[str, array] = {
+            trigram: array("I", positions) for trigram, positions in trigram_lists.items()
+        }
+
+    def match(self, entry: str) -> Optional[str]:
+        """Return the only name the entry plausibly refers to, if there is one"""
+        key = fold(swap_last_first(entry))
+        if not key:
+            return None
+
+        for lookup, lookup_key in ((self._by_key, key), (self._by_tokens, _sorted_tokens(key))):
+            positions = lookup.get(lookup_key)
+            if positions:
+                return self._names[positions[0]] if len(positions) == 1 else None
+
+        return self._fuzzy_match(key)
+
+    def exact(self, entry: str) -> Optional[str]:
+        """Return the name the entry spells, ignoring only case, accents,
+        punctuation and "Last, First" order; no typo correction"""
+        positions = self._by_key.get(fold(swap_last_first(entry)))
+        if positions and len(positions) == 1:
+            return self._names[positions[0]]
+        return None
+
+    def _fuzzy_match(self, key: str) -> Optional[str]:
+        limit = max(1, int(len(key) * self.max_error_ratio))
+        query_trigrams = _trigrams(key)
+
+        # One edit changes at most four trigrams (a transposition), so a name
+        # within `limit` edits shares all but 4 * limit of the query's trigrams
+        required = max(1, len(query_trigrams) - 4 * limit)
+        shared: Counter = Counter()
+        for trigram in query_trigrams:
+            positions = self._trigrams.get(trigram)
+            if positions is not None:
+                shared.update(positions)
+        candidates = sorted(
+            ((count, position) for position, count in shared.items() if count >= required),
+            reverse=True,
+        )
+
+        sorted_key = _sorted_tokens(key)
+        best: List[int] = []
+        best_distance = limit + 1
+        for count, position in candidates:
+            # Later candidates share fewer trigrams and cannot beat the best
+            if count < len(query_trigrams) - 4 * best_distance:
+                break
+            folded = self._folded[position]
+            if abs(len(folded) - len(key)) > min(limit, best_distance):
+                continue
+            distance = edit_distance(key, folded, best_distance)
+            if distance > 0 and " " in key:
+                # Also allow the words to be typed in a different order
+                distance = min(
+                    distance,
+                    edit_distance(sorted_key, _sorted_tokens(folded), best_distance),
+                )
+            if distance < best_distance:
+                best_distance = distance
+                best = [position]
+            elif distance == best_distance and distance <= limit:
+                best.append(position)
+
+        if len(best) != 1:
+            return None
+        return self._names[best[0]]
+
+
+__all__ = ["NameMatcher", "edit_distance", "fold", "swap_last_first"]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from flask import Flask, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import scoped_session
+
+
+# Upper bounds in seconds for request and query latency histograms
+REQUEST_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style; not thread-safe."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        separator = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}'
+        suffix = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{suffix} {self.total:.6f}"
+        yield f"{name}_count{suffix} {self.count}"
+
+
+class Metrics:
+    """Collects request and SQL timings for this process and renders them for Prometheus."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self._queries: Dict[str, Histogram] = {}
+        self._commit_started = threading.local()
+
+    def init_app(self, app: Flask, engine: Engine, session: scoped_session) -> None:
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        event.listen(engine, "before_cursor_execute", self._start_query)
+        event.listen(engine, "after_cursor_execute", self._finish_query)
+        event.listen(engine, "handle_error", self._query_failed)
+        # Commits do not pass through a cursor, so time them from the engine's
+        # commit hook to the session's after_commit
+        event.listen(engine, "commit", self._start_commit)
+        # Every app shares the extension's session, so one listener serves them all
+        if not event.contains(session, "after_commit", _finish_commit):
+            event.listen(session, "after_commit", _finish_commit)
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float) -> None:
+        with self._lock:
+            histogram = self._requests.get((endpoint, method))
+            if histogram is None:
+                histogram = self._requests[(endpoint, method)] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def observe_query(self, statement: str, seconds: float) -> None:
+        kind = statement.lstrip()[:6].upper()
+        if kind not in {"SELECT", "INSERT", "UPDATE", "DELETE", "COMMIT"}:
+            kind = "OTHER"
+        with self._lock:
+            histogram = self._queries.get(kind)
+            if histogram is None:
+                histogram = self._queries[kind] = Histogram(QUERY_BUCKETS)
+            histogram.observe(seconds)
+
+    def render(self, gauges: Optional[Mapping[str, Tuple[str, float]]] = None) -> str:
+        """Prometheus text exposition of the collected metrics and the given gauges"""
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP signin_request_duration_seconds Request latency by endpoint")
+            lines.append("# TYPE signin_request_duration_seconds histogram")
+            for (endpoint, method), histogram in sorted(self._requests.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                lines.extend(histogram.lines("signin_request_duration_seconds", labels))
+
+            lines.append("# HELP signin_responses_total Responses by endpoint and status")
+            lines.append("# TYPE signin_responses_total counter")
+            for (endpoint, method, status), count in sorted(self._responses.items()):
+                lines.append(
+                    f'signin_responses_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}'
+                )
+
+            lines.append("# HELP signin_sql_duration_seconds SQL statement latency by kind")
+            lines.append("# TYPE signin_sql_duration_seconds histogram")
+            for kind, histogram in sorted(self._queries.items()):
+                lines.extend(histogram.lines("signin_sql_duration_seconds", f'kind="{kind}"'))
+
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _start_request() -> None:
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            self.observe_request(
+                request.endpoint or "unmatched",
+                request.method,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+        return response
+
+    @staticmethod
+    def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    def _finish_query(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("metrics_query_started")
+        if started:
+            self.observe_query(statement, time.perf_counter() - started.pop())
+
+    @staticmethod
+    def _query_failed(context) -> None:
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is None or context.statement is None:
+            return
+        started = context.connection.info.get("metrics_query_started")
+        if started:
+            started.pop()
+
+    def _start_commit(self, conn) -> None:
+        self._commit_started.value = time.perf_counter()
+
+    def _finish_commit(self, session) -> None:
+        started = getattr(self._commit_started, "value", None)
+        if started is not None:
+            self._commit_started.value = None
+            self.observe_query("COMMIT", time.perf_counter() - started)
+
+
+def _finish_commit(session) -> None:
+    if not has_app_context():
+        return
+    metrics: Optional[Metrics] = current_app.extensions.get("metrics")
+    if metrics is not None:
+        metrics._finish_commit(session)
+
+
+__all__ = ["Histogram", "Metrics"]
@@ -1,16 +1,64 @@
 from __future__ import annotations
 
+import heapq
+import logging
+from collections import Counter
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Sequence
+from itertools import groupby, islice
+from operator import attrgetter, itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-from ..models import SignInEvent
+from sqlalchemy import func, insert, select, tuple_, update
+
+from ..models import DailyRollup, EventCounter, SignInEvent
+from .cache import DebounceCache
+
+if TYPE_CHECKING:
+    from .archive import EventArchive
+    from .writer import GroupCommitWriter
+
+
+logger = logging.getLogger(__name__)
+
+
+class MovementRecord(NamedTuple):
+    """Read-only projection of a sign-in event row, without ORM bookkeeping."""
+
+    id: int
+    name: str
+    area: str
+    direction: str
+    recorded_at: datetime
+    raw_input: Optional[str]
+
+    def as_dict(self) -> Dict[str, str]:
+        return {
+            "name": self.name,
+            "area": self.area,
+            "direction": self.direction,
+            "recorded_at": self.recorded_at.isoformat(),
+            "raw_input": self.raw_input or "",
+        }
 
 
 @dataclass
 class MovementSummary:
     area: str
-    events: Sequence[SignInEvent]
+    events: Sequence[MovementRecord]
 
     def as_dict(self) -> Dict[str, object]:
         return {
@@ -22,8 +70,37 @@ class MovementSummary:
 class MovementService:
     """Handles persistence and retrieval of sign-in events."""
 
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        *,
+        writer: Optional[GroupCommitWriter] = None,
+        debounce_seconds: float = 0,
+        debounce_max_entries: int = 4096,
+        archive: Optional[EventArchive] = None,
+    ) -> None:
+        self.writer = writer
+        self.archive = archive
+        self._listeners: List[Callable[[Sequence[SignInEvent]], None]] = []
+        # Each key holds the pending write, so a repeat waits for its outcome
+        self._recent: Optional[DebounceCache[Tuple[str, str, str], Future]] = None
+        if debounce_seconds > 0:
+            self._recent = DebounceCache(debounce_seconds, max_entries=debounce_max_entries)
+
+    @property
+    def suppressed_writes(self) -> int:
+        """Repeated sign-ins acknowledged without being stored"""
+        return self._recent.suppressed if self._recent is not None else 0
+
+    def subscribe(self, listener: Callable[[Sequence[SignInEvent]], None]) -> None:
+        """Register a callback that receives events after they are committed"""
+        self._listeners.append(listener)
+
+    def notify_committed(self, events: Sequence[SignInEvent]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception:
+                logger.exception("Movement listener failed")
 
     def record_event(
         self,
@@ -34,8 +111,6 @@ class MovementService:
         raw_input: str | None = None,
         recorded_at: datetime | None = None,
     ) -> SignInEvent:
-        from ..extensions import db
-
         event = SignInEvent(
             name=name,
             area=area,
@@ -43,44 +118,455 @@ class MovementService:
             recorded_at=recorded_at or datetime.now(),
             raw_input=raw_input,
         )
-        db.session.add(event)
-        db.session.commit()
+
+        # Only live sign-ins are debounced; imports carry their own timestamps
+        if self._recent is None or recorded_at is not None:
+            self._store(event)
+            return event
+
+        key = (name, area, event.direction)
+        stored: Future = Future()
+        while True:
+            previous = self._recent.claim(key, stored)
+            if previous is None:
+                break
+            try:
+                # A double tap or second card scan returns the movement already
+                # stored, but only once that write has succeeded
+                return previous.result()
+            except Exception:
+                # The first write failed and gave up its claim, so store this one
+                continue
+        # Going the other way ends the window for the earlier direction
+        self._recent.pop((name, area, "OUT" if event.direction == "IN" else "IN"))
+
+        try:
+            self._store(event)
+        except Exception as exc:
+            self._recent.discard(key, stored)
+            stored.set_exception(exc)
+            raise
+        stored.set_result(event)
         return event
 
-    def events_for_date(self, target_date: date) -> List[SignInEvent]:
+    def _store(self, event: SignInEvent) -> None:
+        from ..extensions import db
+
+        if self.writer is not None:
+            # Blocks until the shared batch containing this event is durable
+            self.writer.submit(event).result()
+            return
+
+        self.persist([event])
+        db.session.flush()
+        # Detach before committing so listeners can read it without a reload
+        db.session.expunge(event)
+        db.session.commit()
+        self.notify_committed([event])
+
+    def record_batch(
+        self, entries: Sequence[Mapping[str, object]]
+    ) -> Tuple[List[SignInEvent], Set[str]]:
+        """Store events carrying idempotency keys with one multi-row INSERT.
+
+        Returns the newly stored events and the keys that were already known.
+        """
+        from ..extensions import db
+
+        rows: Dict[str, Dict[str, object]] = {}
+        duplicates: Set[str] = set()
+        for entry in entries:
+            key = str(entry["idempotency_key"])
+            if key in rows:
+                duplicates.add(key)
+                continue
+            rows[key] = {
+                "name": entry["name"],
+                "area": entry["area"],
+                "direction": str(entry["direction"]).upper(),
+                "recorded_at": entry.get("recorded_at") or datetime.now(),
+                "raw_input": entry.get("raw_input"),
+                "idempotency_key": key,
+            }
+        if not rows:
+            return [], duplicates
+
+        known = set(
+            db.session.execute(
+                select(SignInEvent.idempotency_key)
+                .where(SignInEvent.idempotency_key.in_(list(rows)))
+            ).scalars()
+        )
+        duplicates.update(known)
+        # Replayed queues arrive in any order; store them oldest first
+        new_rows = sorted(
+            (row for key, row in rows.items() if key not in known),
+            key=lambda row: row["recorded_at"],
+        )
+        if not new_rows:
+            return [], duplicates
+
+        # The unique index settles races with a concurrent batch. RETURNING only
+        # lists rows this statement inserted, so a racing copy of the same batch
+        # never reaches the counters or listeners twice
+        stored = db.session.execute(
+            self._insert_skipping_duplicates()
+            .values(new_rows)
+            .returning(SignInEvent.id, SignInEvent.idempotency_key)
+        ).all()
+        ids = dict((key, event_id) for event_id, key in stored)
+        events = []
+        for row in new_rows:
+            if row["idempotency_key"] in ids:
+                events.append(SignInEvent(id=ids[row["idempotency_key"]], **row))
+            else:
+                duplicates.add(row["idempotency_key"])
+        self._update_aggregates(events)
+        db.session.commit()
+        self.notify_committed(events)
+        return events, duplicates
+
+    @staticmethod
+    def _insert_skipping_duplicates():
+        from ..extensions import db
+
+        dialect = db.engine.dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            # Without a conflict clause a racing duplicate fails the whole batch
+            return insert(SignInEvent)
+        return dialect_insert(SignInEvent).on_conflict_do_nothing(
+            index_elements=["idempotency_key"]
+        )
+
+    def persist(self, events: Sequence[SignInEvent]) -> None:
+        """Add events and their counter updates to the current session"""
+        from ..extensions import db
+
+        db.session.add_all(events)
+        self._update_aggregates(events)
+
+    def _update_aggregates(self, events: Sequence[SignInEvent]) -> None:
+        self._increment(
+            EventCounter,
+            Counter(
+                (event.recorded_at.date(), event.area, event.direction)
+                for event in events
+            ),
+        )
+        self._increment(
+            DailyRollup,
+            Counter(
+                (
+                    event.recorded_at.date(),
+                    event.area,
+                    event.direction,
+                    event.recorded_at.hour,
+                )
+                for event in events
+            ),
+        )
+
+    @staticmethod
+    def _increment(model, increments: Counter) -> None:
+        """Add counts to rows keyed by the model's primary key columns"""
+        from ..extensions import db
+
+        keys = [column.name for column in model.__table__.primary_key.columns]
+        for key, amount in increments.items():
+            values = dict(zip(keys, key))
+            statement = update(model).values(count=model.count + amount)
+            for column, value in values.items():
+                statement = statement.where(getattr(model, column) == value)
+            if db.session.execute(statement).rowcount == 0:
+                db.session.add(model(count=amount, **values))
+
+    def counts_for_date(self, target_date: date) -> Dict[str, Dict[str, int]]:
+        """Return event counts for a day keyed by area and then direction"""
+        from ..extensions import db
+
+        rows = db.session.execute(
+            select(EventCounter.area, EventCounter.direction, EventCounter.count)
+            .where(EventCounter.day == target_date)
+        ).all()
+        counts: Dict[str, Dict[str, int]] = {}
+        for area, direction, count in rows:
+            counts.setdefault(area, {"IN": 0, "OUT": 0})[direction] = count
+        return counts
+
+    def rollups_between(
+        self, start: date, end: date
+    ) -> List[Tuple[date, str, str, int, int]]:
+        """Return (day, area, direction, hour, count) rows for an inclusive range"""
+        from ..extensions import db
+
+        rows = db.session.execute(
+            select(
+                DailyRollup.day,
+                DailyRollup.area,
+                DailyRollup.direction,
+                DailyRollup.hour,
+                DailyRollup.count,
+            )
+            .where(DailyRollup.day >= start)
+            .where(DailyRollup.day <= end)
+            .order_by(DailyRollup.day.asc(), DailyRollup.area.asc())
+        ).all()
+        return [tuple(row) for row in rows]
+
+    def iter_event_rows(
+        self,
+        start: date,
+        end: date,
+        *,
+        areas: Sequence[str] | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Sequence[Tuple]]:
+        """Yield batches of raw event rows between two dates inclusive"""
+        from ..extensions import db
+
+        statement = (
+            select(
+                SignInEvent.id,
+                SignInEvent.recorded_at,
+                SignInEvent.area,
+                SignInEvent.name,
+                SignInEvent.direction,
+                SignInEvent.raw_input,
+            )
+            .where(SignInEvent.recorded_at >= datetime.combine(start, datetime.min.time()))
+            .where(SignInEvent.recorded_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+            .order_by(SignInEvent.recorded_at.asc(), SignInEvent.id.asc())
+        )
+        if areas:
+            statement = statement.where(SignInEvent.area.in_(list(areas)))
+
+        result = db.session.execute(statement.execution_options(yield_per=batch_size))
+        try:
+            if self.archive is None or not self.archive.covers(start):
+                for partition in result.partitions():
+                    yield partition
+                return
+
+            # Old days live in the archive; late uploads for them may still be in
+            # the table, so merge both streams by time
+            archived = self.archive.iter_rows(
+                start, min(end, self.archive.horizon - timedelta(days=1)), areas=areas
+            )
+            stored = (row for partition in result.partitions() for row in partition)
+            merged = _unique_rows(heapq.merge(archived, stored, key=itemgetter(1, 0)))
+            while True:
+                batch = list(islice(merged, batch_size))
+                if not batch:
+                    return
+                yield batch
+        finally:
+            result.close()
+
+    def area_events(
+        self,
+        target_date: date,
+        area: str,
+        *,
+        after: Tuple[datetime, int] | None = None,
+        limit: int = 200,
+    ) -> List[MovementRecord]:
+        """Return one area's events for a day in time order, starting after the after cursor"""
+        from ..extensions import db
+
+        start = datetime.combine(target_date, datetime.min.time())
+        statement = (
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+                SignInEvent.raw_input,
+            )
+            .where(SignInEvent.area == area)
+            .where(SignInEvent.recorded_at >= start)
+            .where(SignInEvent.recorded_at < start + timedelta(days=1))
+            .order_by(SignInEvent.recorded_at.asc(), SignInEvent.id.asc())
+            .limit(limit)
+        )
+        # Served by ix_signin_events_area_recorded_at_id
+        if after is not None:
+            statement = statement.where(tuple_(SignInEvent.recorded_at, SignInEvent.id) > tuple_(*after))
+        events = list(map(MovementRecord._make, db.session.execute(statement)))
+
+        if self.archive is None or not self.archive.covers(target_date):
+            return events
+
+        archived = (
+            MovementRecord(event_id, name, row_area, direction, recorded_at, raw_input)
+            for event_id, recorded_at, row_area, name, direction, raw_input
+            in self.archive.iter_rows(target_date, target_date, areas=[area])
+            if after is None or (recorded_at, event_id) > after
+        )
+        merged = heapq.merge(events, archived, key=attrgetter("recorded_at", "id"))
+        return list(islice(_unique_rows(merged, key=attrgetter("id", "recorded_at")), limit))
+
+    def latest_event_id(self) -> Optional[int]:
+        from ..extensions import db
+
+        return db.session.execute(select(func.max(SignInEvent.id))).scalar()
+
+    def person_history(
+        self,
+        name: str,
+        *,
+        start: date | None = None,
+        end: date | None = None,
+        before: Tuple[datetime, int] | None = None,
+        limit: int = 100,
+    ) -> List[MovementRecord]:
+        """Return one person's events newest first, starting after the before cursor"""
+        from ..extensions import db
+
+        # Served by ix_signin_events_name_recorded_at; SQLite keeps the rowid in
+        # the index so the id tiebreaker needs no extra sort
+        statement = (
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+                SignInEvent.raw_input,
+            )
+            .where(SignInEvent.name == name)
+            .order_by(SignInEvent.recorded_at.desc(), SignInEvent.id.desc())
+            .limit(limit)
+        )
+        if start is not None:
+            statement = statement.where(
+                SignInEvent.recorded_at >= datetime.combine(start, datetime.min.time())
+            )
+        if end is not None:
+            statement = statement.where(
+                SignInEvent.recorded_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+            )
+        if before is not None:
+            statement = statement.where(
+                tuple_(SignInEvent.recorded_at, SignInEvent.id) < tuple_(*before)
+            )
+        events = list(map(MovementRecord._make, db.session.execute(statement)))
+
+        horizon = self.archive.horizon if self.archive is not None else None
+        if horizon is None or (start is not None and start >= horizon):
+            return events
+        horizon_at = datetime.combine(horizon, datetime.min.time())
+        if len(events) == limit and events[-1].recorded_at >= horizon_at:
+            # The whole page is newer than anything archived
+            return events
+
+        archive_end = horizon - timedelta(days=1)
+        if end is not None:
+            archive_end = min(end, archive_end)
+        if before is not None:
+            archive_end = min(archive_end, before[0].date())
+        # Read newest month first and lazily, so a full page stops the reading
+        archived = (
+            MovementRecord(event_id, row_name, area, direction, recorded_at, raw_input)
+            for event_id, recorded_at, area, row_name, direction, raw_input in self.archive.iter_rows(
+                start or self.archive.first_day(), archive_end, names=[name], reverse=True
+            )
+            if before is None or (recorded_at, event_id) < before
+        )
+        merged = heapq.merge(events, archived, key=attrgetter("recorded_at", "id"), reverse=True)
+        # Late uploads for archived days can sit in both places after a crash
+        return list(islice(_unique_rows(merged, key=attrgetter("id", "recorded_at")), limit))
+
+    def total_events(self) -> int:
+        from ..extensions import db
+
+        return db.session.execute(select(func.sum(EventCounter.count))).scalar() or 0
+
+    def count_between(self, start: date, end: date) -> int:
+        """Events counted for an inclusive range; counters only grow, so this
+        changes whenever an event lands in the range, from any worker"""
+        from ..extensions import db
+
+        return db.session.execute(
+            select(func.sum(EventCounter.count))
+            .where(EventCounter.day >= start)
+            .where(EventCounter.day <= end)
+        ).scalar() or 0
+
+    def counts_by_day(self, start: date, end: date) -> Dict[date, Dict[str, int]]:
+        """Events counted for an inclusive range keyed by day and then area"""
+        from ..extensions import db
+
+        rows = db.session.execute(
+            select(EventCounter.day, EventCounter.area, func.sum(EventCounter.count))
+            .where(EventCounter.day >= start)
+            .where(EventCounter.day <= end)
+            .group_by(EventCounter.day, EventCounter.area)
+        ).all()
+        counts: Dict[date, Dict[str, int]] = {}
+        for day, area, count in rows:
+            counts.setdefault(day, {})[area] = count
+        return counts
+
+    def events_for_date(self, target_date: date) -> List[MovementRecord]:
+        """Return the day's events ordered by area and time as plain records"""
+        from ..extensions import db
+
         start = datetime.combine(target_date, datetime.min.time())
         end = start + timedelta(days=1)
 
-        # Debug: Log the query parameters
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Querying events for date range: {start} to {end}")
-
-        events = (
-            SignInEvent.query
-            .filter(SignInEvent.recorded_at >= start)
-            .filter(SignInEvent.recorded_at < end)
-            .order_by(SignInEvent.area.asc(), SignInEvent.recorded_at.asc())
-            .all()
+        logger.debug("Querying events from %s to %s", start, end)
+
+        # A Core select skips the identity map and per-row instance state
+        rows = db.session.execute(
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+                SignInEvent.raw_input,
+            )
+            .where(SignInEvent.recorded_at >= start)
+            .where(SignInEvent.recorded_at < end)
+            .order_by(SignInEvent.area.asc(), SignInEvent.recorded_at.asc(), SignInEvent.id.asc())
         )
+        events = list(map(MovementRecord._make, rows))
 
-        logger.info(f"Found {len(events)} events for {target_date}")
+        if self.archive is not None and self.archive.covers(target_date):
+            stored = {(event.id, event.recorded_at) for event in events}
+            events.extend(
+                MovementRecord(event_id, name, area, direction, recorded_at, raw_input)
+                for event_id, recorded_at, area, name, direction, raw_input
+                in self.archive.iter_rows(target_date, target_date)
+                if (event_id, recorded_at) not in stored
+            )
+            events.sort(key=attrgetter("area", "recorded_at", "id"))
 
-        # Also check total events in database
-        total_events = SignInEvent.query.count()
-        logger.info(f"Total events in database: {total_events}")
+        logger.debug("Found %d events for %s", len(events), target_date)
 
         return events
 
     def grouped_events(self, target_date: date) -> List[MovementSummary]:
-        events = self.events_for_date(target_date)
-        grouped: Dict[str, List[SignInEvent]] = {}
-        for event in events:
-            grouped.setdefault(event.area, []).append(event)
+        # Rows arrive sorted by area, so each group is one contiguous run
         return [
-            MovementSummary(area=area, events=grouped[area])
-            for area in sorted(grouped.keys())
+            MovementSummary(area=area, events=list(events))
+            for area, events in groupby(self.events_for_date(target_date), key=attrgetter("area"))
         ]
 
 
-__all__ = ["MovementService", "MovementSummary"]
+def _unique_rows(rows: Iterator[Tuple], key: Callable[[Tuple], Tuple] = itemgetter(0, 1)) -> Iterator[Tuple]:
+    # Rows copied to the archive just before a crash can also still be stored
+    previous = None
+    for row in rows:
+        current = key(row)
+        if current != previous:
+            previous = current
+            yield row
+
+
+__all__ = ["MovementRecord", "MovementService", "MovementSummary"]
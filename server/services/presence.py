@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from ..models import SignInEvent
+
+
+class PresenceIndex:
+    """Tracks who is currently signed in to each area today."""
+
+    def __init__(self, *, areas: Sequence[str] | None = None) -> None:
+        self.areas = list(areas or [])
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._last_id = 0
+        # area -> name -> time the person signed in
+        self._present: Dict[str, Dict[str, datetime]] = {}
+        # name -> (area, time of the latest movement applied)
+        self._location: Dict[str, Tuple[Optional[str], datetime]] = {}
+
+    def rebuild(self) -> None:
+        """Replay today's events in order; must run inside an app context"""
+        from ..extensions import db
+
+        today = date.today()
+        start = datetime.combine(today, datetime.min.time())
+        # Read first so catch_up replays anything committed during the rebuild
+        last_id = db.session.execute(select(func.max(SignInEvent.id))).scalar() or 0
+        rows = db.session.execute(
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+            )
+            .where(SignInEvent.recorded_at >= start)
+            .order_by(SignInEvent.recorded_at.asc(), SignInEvent.id.asc())
+        ).all()
+
+        with self._lock:
+            self._reset(today)
+            for _, name, area, direction, recorded_at in rows:
+                self._apply(name, area, direction, recorded_at)
+            self._last_id = last_id
+
+    def record(self, events: Sequence[SignInEvent]) -> None:
+        """Apply newly committed events"""
+        with self._lock:
+            self._roll_over()
+            for event in events:
+                self._apply(event.name, event.area, event.direction, event.recorded_at)
+            # Only a contiguous run can be skipped by catch_up; a gap may be
+            # another worker's event that this one has not seen yet
+            for event_id in sorted(event.id for event in events if event.id is not None):
+                if event_id == self._last_id + 1:
+                    self._last_id = event_id
+                elif event_id > self._last_id:
+                    break
+
+    def catch_up(self) -> None:
+        """Apply events committed by other processes since the last look"""
+        from ..extensions import db
+
+        if not self._last_id:
+            # Nothing applied yet; today's rows are cheaper to find by time than
+            # by scanning every id in the table
+            self.rebuild()
+            return
+
+        start = datetime.combine(date.today(), datetime.min.time())
+        rows = db.session.execute(
+            select(
+                SignInEvent.id,
+                SignInEvent.name,
+                SignInEvent.area,
+                SignInEvent.direction,
+                SignInEvent.recorded_at,
+            )
+            .where(SignInEvent.recorded_at >= start)
+            .where(SignInEvent.id > self._last_id)
+            .order_by(SignInEvent.id.asc())
+        ).all()
+
+        with self._lock:
+            self._roll_over()
+            for event_id, name, area, direction, recorded_at in rows:
+                self._apply(name, area, direction, recorded_at)
+                self._last_id = max(self._last_id, event_id)
+
+    def snapshot(self) -> Dict[str, List[Tuple[str, datetime]]]:
+        """Return each area's occupants sorted by name"""
+        with self._lock:
+            self._roll_over()
+            present = {area: dict(people) for area, people in self._present.items()}
+
+        ordered: Dict[str, List[Tuple[str, datetime]]] = {}
+        for area in self.areas:
+            ordered[area] = sorted(present.pop(area, {}).items())
+        for area in sorted(present):
+            if present[area]:
+                ordered[area] = sorted(present[area].items())
+        return ordered
+
+    def _roll_over(self) -> None:
+        today = date.today()
+        if self._day != today:
+            self._reset(today)
+
+    def _reset(self, today: date) -> None:
+        self._day = today
+        self._present = {}
+        self._location = {}
+
+    def _apply(self, name: str, area: str, direction: str, recorded_at: datetime) -> None:
+        if recorded_at.date() != self._day:
+            return
+        current_area, last_seen = self._location.get(name, (None, None))
+        # Ignore movements older than what we already know about this person
+        if last_seen is not None and recorded_at < last_seen:
+            return
+
+        if direction == "IN":
+            since = recorded_at
+            if current_area is not None:
+                previous = self._present.get(current_area, {}).pop(name, None)
+                # Signing in again to the same area keeps the original time
+                if current_area == area and previous is not None:
+                    since = previous
+            self._present.setdefault(area, {})[name] = since
+            self._location[name] = (area, recorded_at)
+        elif current_area == area:
+            self._present.get(area, {}).pop(name, None)
+            self._location[name] = (None, recorded_at)
+
+
+__all__ = ["PresenceIndex"]
@@ -1,11 +1,58 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import List, Sequence
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
 
+from ..models import SignInEvent
+from .cache import LRUCache
 from .movements import MovementService, MovementSummary
 
 
+def _empty_counts() -> Dict[str, int]:
+    return {"IN": 0, "OUT": 0}
+
+
+@dataclass
+class AreaRollup:
+    area: str
+    totals: Dict[str, int] = field(default_factory=_empty_counts)
+    by_day: Dict[date, Dict[str, int]] = field(default_factory=dict)
+    by_hour: Dict[int, Dict[str, int]] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "area": self.area,
+            "totals": self.totals,
+            "days": {day.isoformat(): counts for day, counts in self.by_day.items()},
+            "hours": {f"{hour:02d}": counts for hour, counts in self.by_hour.items()},
+        }
+
+
+@dataclass
+class DailyReport:
+    target_date: date
+    summaries: List[MovementSummary]
+    counts: Dict[str, Dict[str, int]]
+    last_modified: datetime
+    etag: str
+    expires_at: Optional[float] = None
+    _payload: Optional[Dict[str, object]] = field(default=None, repr=False)
+
+    def as_dict(self) -> Dict[str, object]:
+        # Serialised once per cached report rather than once per request
+        if self._payload is None:
+            self._payload = {
+                "date": self.target_date.isoformat(),
+                "areas": [summary.as_dict() for summary in self.summaries],
+                "counts": self.counts,
+            }
+        return self._payload
+
+
 class ReportService:
     """Generates movement summaries."""
 
@@ -14,9 +61,61 @@ class ReportService:
         *,
         movement_service: MovementService,
         areas: Sequence[str] | None = None,
+        cache_size: int = 64,
+        today_ttl: int = 30,
     ) -> None:
         self.movement_service = movement_service
         self.areas = list(areas or [])
+        self.today_ttl = today_ttl
+        self._cache: LRUCache[date, DailyReport] = LRUCache(cache_size)
+        movement_service.subscribe(self._invalidate)
+
+    def daily_report(self, target_date: date) -> DailyReport:
+        """Return the report for a day, reusing the cached copy when valid"""
+        cached = self._cache.get(target_date)
+        if cached is not None and cached.expires_at is not None and cached.expires_at > time.monotonic():
+            return cached
+
+        # Today and later are trusted for the TTL. Past days still take offline
+        # uploads through other workers, so they always check the counters
+        expires_at = None
+        if target_date >= date.today():
+            expires_at = time.monotonic() + self.today_ttl
+
+        # Counters change with every event, so they identify the report contents
+        counts = self.counts_for_date(target_date)
+        etag = self._etag(target_date, counts)
+        if cached is not None and cached.etag == etag:
+            cached.expires_at = expires_at
+            return cached
+
+        summaries = self.grouped_summary(target_date)
+        # Each area's events are in time order, so only the last ones compete
+        latest = max(
+            (summary.events[-1].recorded_at for summary in summaries if summary.events),
+            default=datetime.combine(target_date, datetime.min.time()),
+        )
+        report = DailyReport(
+            target_date=target_date,
+            summaries=summaries,
+            counts=counts,
+            last_modified=latest.replace(microsecond=0).astimezone(),
+            etag=etag,
+            expires_at=expires_at,
+        )
+        self._cache.set(target_date, report)
+        return report
+
+    @staticmethod
+    def _etag(target_date: date, counts: Dict[str, Dict[str, int]]) -> str:
+        digest = hashlib.sha1(
+            json.dumps([target_date.isoformat(), counts], sort_keys=True).encode()
+        )
+        return digest.hexdigest()
+
+    def _invalidate(self, events: Sequence[SignInEvent]) -> None:
+        for day in {event.recorded_at.date() for event in events}:
+            self._cache.pop(day)
 
     def grouped_summary(self, target_date: date) -> List[MovementSummary]:
         summaries = self.movement_service.grouped_events(target_date)
@@ -34,8 +133,50 @@ class ReportService:
                 ordered.append(summary)
         return ordered
 
+    def counts_for_date(self, target_date: date) -> Dict[str, Dict[str, int]]:
+        counts = self.movement_service.counts_for_date(target_date)
+        ordered: Dict[str, Dict[str, int]] = {}
+        for area in self.areas:
+            ordered[area] = counts.get(area, {"IN": 0, "OUT": 0})
+        for area in sorted(counts):
+            ordered.setdefault(area, counts[area])
+        return ordered
+
+    def stats(self, target_date: date) -> Dict[str, object]:
+        counts = self.counts_for_date(target_date)
+        stats: Dict[str, object] = {
+            "date": target_date.isoformat(),
+            "total_events": self.movement_service.total_events(),
+            "day_events": sum(sum(directions.values()) for directions in counts.values()),
+            "areas": counts,
+        }
+        stats["suppressed_writes"] = self.movement_service.suppressed_writes
+        writer = self.movement_service.writer
+        if writer is not None:
+            stats["group_commit"] = writer.stats()
+        return stats
+
+    def range_summary(self, start: date, end: date) -> List[AreaRollup]:
+        """Summarise movements per area between two dates inclusive"""
+        by_area: Dict[str, AreaRollup] = {}
+        for day, area, direction, hour, count in self.movement_service.rollups_between(start, end):
+            rollup = by_area.get(area)
+            if rollup is None:
+                rollup = by_area[area] = AreaRollup(area=area)
+            rollup.totals[direction] = rollup.totals.get(direction, 0) + count
+            day_counts = rollup.by_day.setdefault(day, _empty_counts())
+            day_counts[direction] = day_counts.get(direction, 0) + count
+            hour_counts = rollup.by_hour.setdefault(hour, _empty_counts())
+            hour_counts[direction] = hour_counts.get(direction, 0) + count
+
+        ordered = [by_area.pop(area, AreaRollup(area=area)) for area in self.areas]
+        ordered.extend(by_area[area] for area in sorted(by_area))
+        for rollup in ordered:
+            rollup.by_hour = dict(sorted(rollup.by_hour.items()))
+        return ordered
+
     def summary_as_dict(self, target_date: date) -> List[dict]:
         return [summary.as_dict() for summary in self.grouped_summary(target_date)]
 
 
-__all__ = ["ReportService"]
+__all__ = ["AreaRollup", "DailyReport", "ReportService"]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Hashable, Tuple
+
+from flask import Response, current_app, render_template, request
+
+from .cache import LRUCache
+
+
+class PageShellCache:
+    """Rendered kiosk pages reused until their area or assets change."""
+
+    def __init__(self, *, max_entries: int = 64) -> None:
+        self._cache: LRUCache[Tuple[Hashable, ...], Tuple[str, str]] = LRUCache(max_entries)
+
+    def respond(self, template: str, key: Tuple[Hashable, ...], **context) -> Response:
+        """Serve the cached page for key, rendering it on first use, with an ETag"""
+        # Asset URLs are baked into the page, so a new build needs a new render
+        full_key = (template, current_app.extensions["vite_manifest"].version, *key)
+        cached = self._cache.get(full_key)
+        if cached is None:
+            body = render_template(template, **context)
+            cached = (body, hashlib.sha1(body.encode("utf-8")).hexdigest())
+            self._cache.set(full_key, cached)
+
+        body, etag = cached
+        response = current_app.response_class(body, mimetype="text/html")
+        response.set_etag(etag)
+        # Kiosks keep their copy but check back on every load
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+
+__all__ = ["PageShellCache"]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask
+
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Runs slow start-up work on a background thread while requests are served."""
+
+    def __init__(self, *, retry_seconds: float = 1.0, max_retry_seconds: float = 60.0) -> None:
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._steps: List[Tuple[str, Callable[[], object]]] = []
+        self._ready = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def add(self, name: str, step: Callable[[], object]) -> None:
+        """Register a step; each must also be safe to skip, loading lazily on first use"""
+        self._steps.append((name, step))
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, app: Flask) -> None:
+        if self.ready:
+            return
+        # Threads do not survive fork, so each worker process starts its own
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        self._thread = threading.Thread(target=self._run_until_ready, args=(app,), name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run_until_ready(self, app: Flask) -> None:
+        # A failed step (say the database was briefly locked) would otherwise
+        # leave /healthz failing until the process restarts
+        delay = self.retry_seconds
+        while not self.run(app):
+            logger.warning("Retrying warm-up in %.0f s", delay)
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_seconds)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until warm-up ends; True when it succeeded"""
+        self._finished.wait(timeout)
+        return self.ready
+
+    def run(self, app: Flask) -> bool:
+        """Run every step once on this thread; True when all of them succeeded"""
+        from ..extensions import db
+
+        self._finished.clear()
+        started = time.perf_counter()
+        with app.app_context():
+            try:
+                for name, step in self._steps:
+                    step_started = time.perf_counter()
+                    step()
+                    self.timings[name] = time.perf_counter() - step_started
+            except Exception:
+                self.error = f"warm-up step {name} failed"
+                logger.exception("Warm-up step %s failed", name)
+                self._finished.set()
+                return False
+            finally:
+                db.session.remove()
+
+        self.timings["total"] = time.perf_counter() - started
+        self.error = None
+        self._ready.set()
+        self._finished.set()
+        logger.info(
+            "Warm-up finished in %.0f ms",
+            self.timings["total"] * 1000,
+            extra={"warmup_ms": {key: round(value * 1000, 1) for key, value in self.timings.items()}},
+        )
+        return True
+
+
+__all__ = ["Warmup"]
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Flask
+
+from ..extensions import db
+from ..models import SignInEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+BATCH_SIZE_BUCKETS: Tuple[int, ...] = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class GroupCommitWriter:
+    """Commits sign-in events from many requests in shared transactions."""
+
+    def __init__(
+        self,
+        app: Flask,
+        *,
+        persist: Callable[[Sequence[SignInEvent]], None],
+        on_commit: Optional[Callable[[Sequence[SignInEvent]], None]] = None,
+        interval_ms: int = 10,
+        max_batch: int = 64,
+    ) -> None:
+        self.app = app
+        self.persist = persist
+        self.on_commit = on_commit
+        self.interval = max(interval_ms, 0) / 1000
+        self.max_batch = max(max_batch, 1)
+        self._queue: queue.Queue[Optional[Tuple[SignInEvent, Future]]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._events = 0
+        self._largest_batch = 0
+        self._histogram: Dict[int, int] = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._overflow = 0
+        atexit.register(self.close)
+
+    def submit(self, event: SignInEvent) -> Future:
+        """Queue an event; the future resolves once its batch is committed"""
+        self._ensure_running()
+        future: Future = Future()
+        self._queue.put((event, future))
+        return future
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive() or self._pid != os.getpid():
+                return
+            self._queue.put(None)
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "events": self._events,
+                "largest_batch": self._largest_batch,
+                "batch_sizes": dict(self._histogram),
+                "batch_sizes_overflow": self._overflow,
+            }
+
+    def _ensure_running(self) -> None:
+        # Threads do not survive fork, so a worker process starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="group-commit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        pending = self._queue
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[Tuple[SignInEvent, Future]]) -> None:
+        events = [event for event, _ in batch]
+        with self.app.app_context():
+            try:
+                self.persist(events)
+                db.session.flush()
+                # Detach before committing so callers can still read the rows
+                db.session.expunge_all()
+                db.session.commit()
+            except Exception as exc:
+                db.session.rollback()
+                logger.exception("Group commit of %d events failed", len(events))
+                for _, future in batch:
+                    future.set_exception(exc)
+                return
+
+        self._record_batch(len(events))
+        if self.on_commit is not None:
+            try:
+                self.on_commit(events)
+            except Exception:
+                logger.exception("Group commit callback failed")
+        for _, future in batch:
+            future.set_result(None)
+
+    def _record_batch(self, size: int) -> None:
+        with self._stats_lock:
+            self._batches += 1
+            self._events += size
+            self._largest_batch = max(self._largest_batch, size)
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._overflow += 1
+        logger.debug("Committed batch of %d events", size)
+
+
+__all__ = ["GroupCommitWriter", "BATCH_SIZE_BUCKETS"]
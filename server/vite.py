@@ -1,62 +1,125 @@
 from __future__ import annotations
 
 import json
+import logging
+import mimetypes
+import threading
 from pathlib import Path
-from typing import Dict, List
-
-from flask import current_app, url_for
-
-
-def _load_manifest() -> Dict[str, dict]:
-    static_folder = Path(current_app.static_folder or "static")
-    manifest_path = static_folder / "dist" / ".vite" / "manifest.json"
-    cache_key = "_vite_manifest_cache"
-    mtime_key = "_vite_manifest_mtime"
-
-    try:
-        stat = manifest_path.stat()
-    except FileNotFoundError:
-        current_app.logger.warning("Vite manifest not found at %s", manifest_path)
-        current_app.config[cache_key] = {}
-        current_app.config[mtime_key] = None
-        return {}
-
-    cached_manifest = current_app.config.get(cache_key)
-    cached_mtime = current_app.config.get(mtime_key)
-    if cached_manifest is not None and cached_mtime == stat.st_mtime:
-        return cached_manifest
-
-    with manifest_path.open(encoding="utf-8") as handle:
-        manifest = json.load(handle)
-
-    current_app.config[cache_key] = manifest
-    current_app.config[mtime_key] = stat.st_mtime
-    return manifest
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, request, send_from_directory, url_for
+
+
+logger = logging.getLogger(__name__)
+
+# Precompressed copies written next to each asset by the Vite build, best first
+ENCODINGS: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+# Hashed build output never changes under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class ViteManifest:
+    """Entry point to asset path map resolved from the Vite build manifest."""
+
+    def __init__(self, path: str | Path, *, reload: bool = False) -> None:
+        self.path = Path(path)
+        # Development rebuilds rewrite the manifest; production builds never do
+        self.reload = reload
+        self._mtime: Optional[float] = None
+        self._entries: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def version(self) -> Optional[float]:
+        if self.reload:
+            self._reload_if_changed()
+        return self._mtime
+
+    def load(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+            with self.path.open(encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        except FileNotFoundError:
+            logger.warning("Vite manifest not found at %s", self.path)
+            mtime, manifest = None, {}
+
+        entries: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        for name, data in manifest.items():
+            if isinstance(data, dict) and data.get("file"):
+                entries[name] = (data["file"], tuple(data.get("css", [])))
+            elif isinstance(data, str):
+                entries[name] = (data, ())
+        self._entries = entries
+        self._mtime = mtime
+
+    def entry(self, name: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        """Built file and stylesheets for an entry point, relative to dist"""
+        if self.reload:
+            self._reload_if_changed()
+        return self._entries.get(name)
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            with self._lock:
+                self.load()
+
+
+def init_app(app: Flask) -> None:
+    dist = Path(app.static_folder or "static") / "dist"
+    app.extensions["vite_manifest"] = ViteManifest(
+        dist / ".vite" / "manifest.json",
+        reload=app.config.get("VITE_RELOAD_MANIFEST", False) or app.debug,
+    )
+    # More specific than the built-in static route, so it wins for build output
+    app.add_url_rule(
+        f"{app.static_url_path}/dist/<path:filename>",
+        endpoint="vite_dist",
+        view_func=_send_dist,
+    )
+
+
+def _send_dist(filename: str) -> Response:
+    dist = Path(current_app.static_folder or "static") / "dist"
+    accepted = request.accept_encodings
+    encoding = None
+    served = filename
+    for name, suffix in ENCODINGS:
+        if accepted[name] and (dist / f"{filename}{suffix}").is_file():
+            encoding, served = name, f"{filename}{suffix}"
+            break
+
+    immutable = filename.startswith("assets/")
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    response = send_from_directory(
+        dist, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE if immutable else 0
+    )
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+    if immutable:
+        response.cache_control.immutable = True
+    return response
 
 
 def vite_asset(entry: str) -> str:
-    manifest = _load_manifest()
-    entry_data = manifest.get(entry)
-    file_path = None
-    if isinstance(entry_data, dict):
-        file_path = entry_data.get("file")
-    elif isinstance(entry_data, str):
-        file_path = entry_data
-
-    if not file_path:
+    resolved = current_app.extensions["vite_manifest"].entry(entry)
+    if resolved is None:
         current_app.logger.warning("Entry '%s' not found in Vite manifest", entry)
         return url_for("static", filename=f"dist/{entry}")
-
-    return url_for("static", filename=f"dist/{file_path}")
+    return url_for("static", filename=f"dist/{resolved[0]}")
 
 
 def vite_styles(entry: str) -> List[str]:
-    manifest = _load_manifest()
-    entry_data = manifest.get(entry)
-    css_files: List[str] = []
-    if isinstance(entry_data, dict):
-        css_files = entry_data.get("css", [])
-    return [url_for("static", filename=f"dist/{path}") for path in css_files]
+    resolved = current_app.extensions["vite_manifest"].entry(entry)
+    if resolved is None:
+        return []
+    return [url_for("static", filename=f"dist/{path}") for path in resolved[1]]
 
 
-__all__ = ["vite_asset", "vite_styles"]
+__all__ = ["ViteManifest", "init_app", "vite_asset", "vite_styles"]
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from server import create_app
+from server.config import BaseConfig, ProductionConfig
+
+
+AREAS = ["Library", "Gym"]
+NAMES = ["John Smith", "Jane Doe", "Alex Johnson"]
+
+
+@pytest.fixture
+def make_app(tmp_path: Path):
+    apps = []
+
+    def build(*, production: bool = False, **overrides):
+        config = ProductionConfig() if production else BaseConfig()
+        config.DATA_DIR = str(tmp_path)
+        config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'signin.sqlite'}"
+        config.NAMES_FILE_PATH = None
+        config.STUDENT_CSV_PATH = None
+        config.NAMES_LIST = list(NAMES)
+        config.AREAS = list(AREAS)
+        config.ACCESS_KEY = "test"
+        config.REPORT_USERNAME = "test"
+        config.REPORT_PASSWORD = "test"
+        config.NAMES_WATCH_SECONDS = 0
+        config.WARMUP_IN_BACKGROUND = False
+        config.METRICS_ENABLED = False
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        app = create_app(config)
+        apps.append(app)
+        return app
+
+    yield build
+
+    for app in apps:
+        with app.app_context():
+            from server.extensions import db
+
+            db.session.remove()
+            db.engine.dispose()
+
+
+def kiosk_client(app, area: str = AREAS[0]):
+    client = app.test_client()
+    client.get(f"/?key=test&area={area}")
+    return client
+
+
+def reports_client(app):
+    client = app.test_client()
+    client.post("/reports/login", data={"username": "test", "password": "test"})
+    return client
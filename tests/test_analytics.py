@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from .conftest import kiosk_client, reports_client
+
+
+def _event(key: str, direction: str, recorded_at: datetime) -> dict:
+    return {
+        "idempotency_key": key,
+        "entry": "John Smith",
+        "area": "Gym",
+        "direction": direction,
+        "recorded_at": recorded_at.isoformat(),
+    }
+
+
+def _gym(client, start: date, end: date) -> dict:
+    response = client.get(f"/reports/analytics?format=json&from={start}&to={end}")
+    assert response.status_code == 200
+    return next(area for area in response.get_json()["areas"] if area["area"] == "Gym")
+
+
+def test_late_upload_to_a_past_day_refreshes_cached_analytics(make_app):
+    app = make_app()
+    # A second app on the same database stands in for another worker
+    other_worker = make_app()
+    yesterday = date.today() - timedelta(days=1)
+    arrived = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=9)
+    kiosk = kiosk_client(app)
+    kiosk.post("/api/events/batch", json={"events": [_event("in", "in", arrived)]})
+
+    client = reports_client(app)
+    before = _gym(client, yesterday, yesterday)
+    assert before["inferred_ends"] == 1
+
+    kiosk_client(other_worker).post(
+        "/api/events/batch", json={"events": [_event("out", "out", arrived + timedelta(minutes=45))]}
+    )
+
+    after = _gym(client, yesterday, yesterday)
+    assert after["inferred_ends"] == 0
+    assert after["dwell_minutes"]["max"] == 45.0
+
+
+def test_default_range_ending_today_is_cached(make_app):
+    app = make_app()
+    service = app.extensions["analytics_service"]
+    today = date.today()
+
+    with app.app_context():
+        first = service.report(today - timedelta(days=27), today)
+        assert service.report(today - timedelta(days=27), today) is first
+
+
+def test_finished_days_are_paired_once_and_read_back(make_app, monkeypatch):
+    app = make_app()
+    yesterday = date.today() - timedelta(days=1)
+    arrived = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=9)
+    kiosk_client(app).post(
+        "/api/events/batch",
+        json={
+            "events": [
+                _event("in", "in", arrived),
+                _event("out", "out", arrived + timedelta(minutes=30)),
+            ]
+        },
+    )
+    first = _gym(reports_client(app), yesterday, yesterday)
+
+    # Another worker has no cached report and must not walk the raw events again
+    other_worker = make_app()
+    service = other_worker.extensions["analytics_service"]
+
+    def no_raw_rows(start, end):
+        raise AssertionError(f"paired {start} to {end} again")
+
+    monkeypatch.setattr(service, "_rows", no_raw_rows)
+    assert _gym(reports_client(other_worker), yesterday, yesterday) == first
+    assert first["visits"] == 1
+    assert first["dwell_minutes"]["median"] == 30.0
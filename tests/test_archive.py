@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from server.services.archive import in_window, parse_window
+
+
+def test_vacuum_window_may_cross_midnight():
+    window = parse_window("22:30-05:00")
+
+    assert in_window(window, time(23, 0))
+    assert in_window(window, time(4, 59))
+    assert not in_window(window, time(12, 0))
+    assert not in_window(parse_window(""), time(3, 0))
+
+
+def test_archive_command_reports_a_running_archive(make_app):
+    app = make_app()
+    archive = app.extensions["event_archive"]
+    archive.directory.mkdir(parents=True, exist_ok=True)
+
+    with archive._locked():
+        result = app.test_cli_runner().invoke(args=["archive-events"])
+
+    assert result.exit_code == 1
+    assert "already running" in result.output
+    assert "Traceback" not in result.output
+
+
+def test_iter_rows_reads_newest_month_first(make_app):
+    app = make_app()
+    archive = app.extensions["event_archive"]
+    archive.directory.mkdir(parents=True, exist_ok=True)
+    newest = datetime(2024, 3, 10, 9)
+    for event_id, recorded_at in enumerate(
+        [newest - timedelta(days=62), newest - timedelta(days=31), newest, newest + timedelta(hours=1)],
+        start=1,
+    ):
+        archive._append(
+            archive.path_for(recorded_at.year, recorded_at.month),
+            [(event_id, recorded_at, "Library", "John Smith", "IN", None)],
+        )
+
+    rows = archive.iter_rows(newest.date() - timedelta(days=90), newest.date(), reverse=True)
+
+    assert [row[0] for row in rows] == [4, 3, 2, 1]
+    filtered = archive.iter_rows(newest.date(), newest.date(), names=["Jane Doe"])
+    assert list(filtered) == []
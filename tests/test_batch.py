@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from server.extensions import db
+from server.models import EventCounter, SignInEvent
+
+from .conftest import kiosk_client
+
+
+def _batch(count: int) -> dict:
+    start = datetime.now().replace(microsecond=0) - timedelta(hours=2)
+    return {
+        "events": [
+            {
+                "idempotency_key": f"key-{index}",
+                "entry": "John Smith",
+                "area": "Library",
+                "direction": "in" if index % 2 == 0 else "out",
+                "recorded_at": (start + timedelta(seconds=index)).isoformat(),
+            }
+            for index in range(count)
+        ]
+    }
+
+
+def test_concurrent_identical_batches_count_each_row_once(make_app):
+    app = make_app(production=True, SIGNIN_DEBOUNCE_SECONDS=0)
+    payload = _batch(300)
+    barrier = threading.Barrier(4)
+    statuses = []
+
+    def post() -> None:
+        client = kiosk_client(app)
+        barrier.wait()
+        response = client.post("/api/events/batch", json=payload)
+        statuses.append(response.status_code)
+        recorded = sum(r["status"] == "recorded" for r in response.get_json()["results"])
+        statuses.append(recorded)
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        rows = db.session.execute(select(func.count(SignInEvent.id))).scalar()
+        counted = db.session.execute(select(func.sum(EventCounter.count))).scalar()
+    assert rows == 300
+    assert counted == rows
+    # Every row was reported as recorded by exactly one of the requests
+    assert sum(statuses[1::2]) == 300
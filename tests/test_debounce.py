@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+
+def _hold_first_write(monkeypatch, service, *, fail: bool):
+    """Make the first store block until released, then succeed or fail"""
+    started = threading.Event()
+    release = threading.Event()
+    store = service._store
+    calls = []
+
+    def slow_store(event):
+        calls.append(event)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+            if fail:
+                raise RuntimeError("disk I/O error")
+        store(event)
+
+    monkeypatch.setattr(service, "_store", slow_store)
+    return started, release, calls
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_repeat_tap_waits_for_the_first_write(make_app, monkeypatch, fail):
+    app = make_app(SIGNIN_DEBOUNCE_SECONDS=5)
+    service = app.extensions["movement_service"]
+    started, release, calls = _hold_first_write(monkeypatch, service, fail=fail)
+    results = {}
+
+    def tap(label):
+        with app.app_context():
+            try:
+                results[label] = service.record_event(name="John Smith", area="Gym", direction="in")
+            except RuntimeError as exc:
+                results[label] = exc
+
+    first = threading.Thread(target=tap, args=("first",))
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=tap, args=("second",))
+    second.start()
+    second.join(0.2)
+    # Not acknowledged while the first write is still in flight
+    assert second.is_alive()
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    if fail:
+        assert isinstance(results["first"], RuntimeError)
+        # The repeat is stored itself rather than acknowledged as the failed one
+        assert len(calls) == 2
+        assert results["second"].id is not None
+    else:
+        assert len(calls) == 1
+        assert results["second"] is results["first"]
+    with app.app_context():
+        assert service.counts_for_date(results["second"].recorded_at.date()) == {
+            "Gym": {"IN": 1, "OUT": 0}
+        }
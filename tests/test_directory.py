@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from server.services.directory import NameDirectory
+
+
+def _touch_later(path, seconds: float) -> None:
+    stat = path.stat()
+    os.utime(path, (stat.st_atime + seconds, stat.st_mtime + seconds))
+
+
+@pytest.mark.parametrize("breakage", ["invalid utf-8", "deleted", "truncated"])
+def test_unreadable_names_file_keeps_the_current_directory(tmp_path, breakage):
+    names_file = tmp_path / "names.txt"
+    names_file.write_text("John Smith\nJane Doe\n", encoding="utf-8")
+    directory = NameDirectory(names_file_path=str(names_file))
+    assert directory.has_name("John Smith")
+
+    if breakage == "deleted":
+        names_file.unlink()
+    else:
+        names_file.write_bytes(b"\xff\xfeJohn \xc3" if breakage == "invalid utf-8" else b"")
+        _touch_later(names_file, 10)
+    directory.reload_if_changed()
+
+    assert directory.has_name("John Smith")
+    assert directory.size == 2
+    # The failed read is not retried until the file changes again
+    assert directory.reload_if_changed() is False
+
+    names_file.write_text("John Smith\nAlex Johnson\n", encoding="utf-8")
+    _touch_later(names_file, 20)
+    assert directory.reload_if_changed() is True
+    assert directory.has_name("Alex Johnson")
+    assert not directory.has_name("Jane Doe")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from server.extensions import db
+from server.services import metrics as metrics_module
+
+from .conftest import reports_client
+
+
+def test_metrics_need_a_reports_session_or_the_scrape_token(make_app):
+    app = make_app(METRICS_ENABLED=True, METRICS_TOKEN="scrape")
+
+    assert app.test_client().get("/metrics").status_code == 401
+    wrong = app.test_client().get("/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+    scraper = app.test_client().get("/metrics", headers={"Authorization": "Bearer scrape"})
+    assert scraper.status_code == 200
+    assert b"signin_request_duration_seconds" in scraper.data
+    assert reports_client(app).get("/metrics").status_code == 200
+
+
+def test_failed_statement_does_not_leave_its_start_time(make_app):
+    app = make_app(METRICS_ENABLED=True)
+
+    with app.app_context(), db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("SELECT * FROM no_such_table")
+        assert not connection.info.get("metrics_query_started")
+
+
+def _commits(app) -> int:
+    histogram = app.extensions["metrics"]._queries.get("COMMIT")
+    return histogram.count if histogram else 0
+
+
+def test_each_commit_is_timed_once_by_its_own_app(make_app):
+    first = make_app(METRICS_ENABLED=True)
+    second = make_app(METRICS_ENABLED=True)
+    before = _commits(first), _commits(second)
+
+    with second.app_context():
+        db.session.execute(text("SELECT 1"))
+        db.session.commit()
+
+    assert (_commits(first), _commits(second)) == (before[0], before[1] + 1)
+    assert event.contains(db.session, "after_commit", metrics_module._finish_commit)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from .conftest import kiosk_client, reports_client
+
+
+def _history(client, name: str) -> dict:
+    response = client.get(f"/reports/person/{name}?format=json")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_name_not_in_directory_is_not_matched_to_a_similar_name(make_app):
+    app = make_app()
+    kiosk = kiosk_client(app)
+    kiosk.post("/signin", data={"entry": "John Smith", "direction": "in"})
+    client = reports_client(app)
+
+    history = _history(client, "Jon Smith")
+
+    assert history["name"] == "Jon Smith"
+    assert history["events"] == []
+    assert [event["name"] for event in _history(client, "John Smith")["events"]] == ["John Smith"]
+
+
+def test_case_and_last_first_order_resolve_to_the_directory_name(make_app):
+    app = make_app()
+    kiosk_client(app).post("/signin", data={"entry": "John Smith", "direction": "in"})
+    client = reports_client(app)
+
+    assert _history(client, "smith, john")["name"] == "John Smith"
+    assert len(_history(client, "smith, john")["events"]) == 1
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from .conftest import kiosk_client, reports_client
+
+
+def _present(client) -> dict:
+    response = client.get("/reports/presence?format=json")
+    assert response.status_code == 200
+    return {
+        area: sorted(person["name"] for person in people)
+        for area, people in response.get_json()["areas"].items()
+    }
+
+
+def test_catch_up_applies_events_from_other_workers(make_app):
+    app = make_app()
+    # A second app on the same database stands in for another worker
+    other_worker = make_app()
+    kiosk_client(app).post("/signin", data={"entry": "John Smith", "direction": "in"})
+    kiosk_client(other_worker).post("/signin", data={"entry": "Jane Doe", "direction": "in"})
+
+    assert _present(reports_client(app))["Library"] == ["Jane Doe", "John Smith"]
+
+
+def test_local_events_advance_the_catch_up_position(make_app):
+    app = make_app()
+    kiosk = kiosk_client(app)
+    kiosk.post("/signin", data={"entry": "John Smith", "direction": "in"})
+    kiosk.post("/signin", data={"entry": "Jane Doe", "direction": "in"})
+
+    with app.app_context():
+        latest = app.extensions["movement_service"].latest_event_id()
+    # Nothing left for catch_up to read again
+    assert app.extensions["presence_index"]._last_id == latest == 2
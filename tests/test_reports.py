@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+from flask import session
+
+from .conftest import kiosk_client, reports_client
+
+
+def _upload(app, key: str, recorded_at: datetime) -> None:
+    response = kiosk_client(app).post("/api/events/batch", json={"events": [{
+        "idempotency_key": key,
+        "entry": "Jane Doe",
+        "area": "Library",
+        "direction": "in",
+        "recorded_at": recorded_at.isoformat(),
+    }]})
+    assert response.status_code == 200
+
+
+def test_past_day_report_reflects_upload_from_another_worker(make_app):
+    app = make_app()
+    # A second app on the same database stands in for another worker
+    other_worker = make_app()
+    yesterday = date.today() - timedelta(days=1)
+    noon = datetime.combine(yesterday, datetime.min.time()) + timedelta(hours=12)
+    _upload(app, "first", noon)
+
+    client = reports_client(app)
+    first = client.get(f"/reports/?date={yesterday}&format=json")
+    assert first.get_json()["counts"]["Library"]["IN"] == 1
+
+    _upload(other_worker, "late", noon + timedelta(minutes=5))
+
+    second = client.get(
+        f"/reports/?date={yesterday}&format=json", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.get_json()["counts"]["Library"]["IN"] == 2
+
+
+def test_stream_closed_before_it_starts_frees_its_slot(make_app):
+    app = make_app(STREAM_MAX_CLIENTS=1)
+    broadcaster = app.extensions["event_broadcaster"]
+
+    with app.test_request_context("/reports/stream"):
+        session["reports_authenticated"] = True
+        response = app.full_dispatch_request()
+        assert response.status_code == 200
+        assert broadcaster.subscriber_count == 1
+        # The client goes away before the server starts sending the body
+        response.close()
+    assert broadcaster.subscriber_count == 0
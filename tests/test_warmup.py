@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from server.services import directory as directory_module
+from server.services.directory import NameDirectory
+from server.services.warmup import Warmup
+
+
+def test_failed_warmup_is_retried_until_it_succeeds(make_app):
+    app = make_app()
+    attempts = []
+
+    def flaky() -> None:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("database is locked")
+
+    warmup = Warmup(retry_seconds=0.01)
+    warmup.add("flaky", flaky)
+    warmup.start(app)
+
+    deadline = time.monotonic() + 5
+    while not warmup.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert warmup.ready
+    assert len(attempts) == 3
+    assert warmup.error is None
+
+
+def test_exact_name_matches_while_the_fuzzy_index_is_built(monkeypatch):
+    building = threading.Event()
+    release = threading.Event()
+    build_index = directory_module._DirectoryIndex
+
+    def slow_index(*args, **kwargs):
+        building.set()
+        release.wait(5)
+        return build_index(*args, **kwargs)
+
+    monkeypatch.setattr(directory_module, "_DirectoryIndex", slow_index)
+    directory = NameDirectory(names_list=["Smith, John", "Jane Doe"], lazy=True)
+    loader = threading.Thread(target=directory.warm)
+    loader.start()
+    try:
+        assert building.wait(5)
+        assert directory.match("John Smith") == "John Smith"
+        assert not directory.loaded
+    finally:
+        release.set()
+        loader.join()
+    assert directory.match("jane doe") == "Jane Doe"